@@ -4,7 +4,11 @@ from django.shortcuts import reverse, HttpResponseRedirect
 from django.templatetags.static import static
 from django.utils.html import format_html
 from django.utils.http import url_has_allowed_host_and_scheme
+from phonenumber_field.phonenumber import PhoneNumber, to_python
 
+from .models import ArchivedOrder
+from .models import ArchivedOrderItem
+from .models import Banner
 from .models import Product
 from .models import ProductCategory
 from .models import Restaurant
@@ -12,6 +16,8 @@ from .models import RestaurantMenuItem
 from .models import Order
 from .models import OrderItem
 from .models import Location
+from .search import search_products
+from .signals import restaurant_address_changed
 
 
 class RestaurantMenuItemInline(admin.TabularInline):
@@ -31,10 +37,19 @@ class RestaurantAdmin(admin.ModelAdmin):
         'address',
         'contact_phone',
     ]
+    readonly_fields = [
+        'latitude',
+        'longitude',
+    ]
     inlines = [
         RestaurantMenuItemInline
     ]
 
+    def save_model(self, request, obj, form, change):
+        if 'address' in form.changed_data or obj.coordinates is None:
+            restaurant_address_changed.send(sender=Restaurant, instance=obj)
+        super().save_model(request, obj, form, change)
+
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -51,8 +66,8 @@ class ProductAdmin(admin.ModelAdmin):
         'category',
     ]
     search_fields = [
-        # FIXME SQLite can not convert letter case for cyrillic words properly, so search will be buggy.
-        # Migration to PostgreSQL is necessary
+        # SQLite не умеет приводить к нижнему регистру кириллицу,
+        # поэтому поиск идёт по индексу foodcartapp.search, см. get_search_results
         'name',
         'category__name',
     ]
@@ -95,32 +110,78 @@ class ProductAdmin(admin.ModelAdmin):
     def get_image_preview(self, obj):
         if not obj.image:
             return 'выберите картинку'
-        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=obj.image.url)
+        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=obj.get_image_variant_url(400))
     get_image_preview.short_description = 'превью'
 
     def get_image_list_preview(self, obj):
         if not obj.image or not obj.id:
             return 'нет картинки'
         edit_url = reverse('admin:foodcartapp_product_change', args=(obj.id,))
-        return format_html('<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>', edit_url=edit_url, src=obj.image.url)
+        return format_html('<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>', edit_url=edit_url, src=obj.thumbnail_url)
     get_image_list_preview.short_description = 'превью'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=search_products(search_term)), False
+
 
 @admin.register(ProductCategory)
 class ProductAdmin(admin.ModelAdmin):
     pass
 
 
+@admin.register(Banner)
+class BannerAdmin(admin.ModelAdmin):
+    list_display = [
+        'get_image_list_preview',
+        'title',
+        'position',
+        'active_from',
+        'active_until',
+    ]
+    list_display_links = [
+        'title',
+    ]
+    list_editable = [
+        'position',
+    ]
+
+    def get_image_list_preview(self, obj):
+        if not obj.image:
+            return 'нет картинки'
+        return format_html('<img src="{src}" style="max-height: 50px;"/>', src=obj.image.url)
+    get_image_list_preview.short_description = 'превью'
+
+
+class PhoneNumberSearchMixin:
+    search_fields = [
+        'phonenumber',
+    ]
+
+    def get_search_results(self, request, queryset, search_term):
+        # поиск только по точному номеру: он идёт по индексу, а не перебором всех заказов
+        if not search_term:
+            return queryset, False
+        phonenumber = to_python(search_term, region='RU')
+        if not isinstance(phonenumber, PhoneNumber) or not phonenumber.is_valid():
+            return queryset.none(), False
+        return queryset.filter(phonenumber=phonenumber), False
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(PhoneNumberSearchMixin, admin.ModelAdmin):
     inlines = [
         OrderItemInline,
     ]
+    readonly_fields = [
+        'total_cost',
+    ]
 
     def response_change(self, request, obj):
         custom_response = super(OrderAdmin, self).response_change(request, obj)
@@ -130,6 +191,51 @@ class OrderAdmin(admin.ModelAdmin):
             return custom_response
 
 
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    extra = 0
+    fields = [
+        'product',
+        'quantity',
+        'price',
+    ]
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(PhoneNumberSearchMixin, admin.ModelAdmin):
+    inlines = [
+        ArchivedOrderItemInline,
+    ]
+    list_display = [
+        'id',
+        'registered_at',
+        'firstname',
+        'lastname',
+        'phonenumber',
+        'total_cost',
+    ]
+    date_hierarchy = 'registered_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
     pass
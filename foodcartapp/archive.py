@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderRestaurantCandidate
+
+
+def get_month_start(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def get_next_month_start(month_start):
+    return get_month_start(month_start + timedelta(days=32))
+
+
+def ensure_archive_partitions(months):
+    # в остальных базах архив — обычные таблицы без секций
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for month_start in sorted(months):
+            for model in (ArchivedOrder, ArchivedOrderItem):
+                table = model._meta.db_table
+                partition = f'{table}_y{month_start.year}m{month_start.month:02}'
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {connection.ops.quote_name(partition)} '
+                    f'PARTITION OF {connection.ops.quote_name(table)} '
+                    f'FOR VALUES FROM (%s) TO (%s)',
+                    [month_start, get_next_month_start(month_start)],
+                )
+
+
+def delete_orders(order_ids):
+    # удаляем напрямую, без Collector: сигналы удаления заказа и его позиций
+    # (события доски, пересчёт стоимости) для выполненных заказов не нужны,
+    # а на каждую позицию они добавили бы по нескольку запросов
+    placeholders = ', '.join(['%s'] * len(order_ids))
+    with connection.cursor() as cursor:
+        for model, column in [(OrderRestaurantCandidate, 'order_id'), (OrderItem, 'order_id'), (Order, 'id')]:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} '
+                f'WHERE {connection.ops.quote_name(column)} IN ({placeholders})',
+                order_ids,
+            )
+
+
+def archive_orders(older_than, batch_size):
+    # одна пачка — одна короткая транзакция, блокируются только переносимые строки
+    lock_options = {}
+    if connection.features.has_select_for_update_skip_locked:
+        lock_options['skip_locked'] = True
+
+    with transaction.atomic():
+        orders = list(
+            Order.objects
+            .filter(status=Order.DONE, registered_at__lt=older_than)
+            .select_for_update(**lock_options)
+            .order_by('registered_at')[:batch_size]
+        )
+        if not orders:
+            return 0
+
+        registered_at = {order.id: order.registered_at for order in orders}
+        items = OrderItem.objects.filter(order__in=orders)
+        ensure_archive_partitions({get_month_start(order.registered_at) for order in orders})
+
+        archived_at = timezone.now()
+        ArchivedOrder.objects.bulk_create(
+            ArchivedOrder(
+                id=order.id,
+                status=order.status,
+                payment_type=order.payment_type,
+                firstname=order.firstname,
+                lastname=order.lastname,
+                phonenumber=order.phonenumber,
+                address=order.address,
+                comment=order.comment,
+                restaurant_id=order.restaurant_id,
+                registered_at=order.registered_at,
+                called_at=order.called_at,
+                delivered_at=order.delivered_at,
+                total_cost=order.total_cost,
+                archived_at=archived_at,
+            )
+            for order in orders
+        )
+        ArchivedOrderItem.objects.bulk_create(
+            ArchivedOrderItem(
+                id=item.id,
+                order_id=item.order_id,
+                product_id=item.product_id,
+                quantity=item.quantity,
+                price=item.price,
+                registered_at=registered_at[item.order_id],
+            )
+            for item in items
+        )
+        delete_orders(list(registered_at))
+
+    return len(orders)
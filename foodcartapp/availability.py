@@ -0,0 +1,70 @@
+from .models import Restaurant, RestaurantMenuItem
+
+
+class AvailabilityBitmap:
+    # матрица товар × ресторан: для каждого товара хранится битовая маска
+    # ресторанов, где он в продаже, проверка доступности — одна операция &
+    def __init__(self, version, restaurants, available_pairs):
+        self.version = version
+        self.restaurant_names = dict(restaurants)
+        self.restaurant_ids = list(self.restaurant_names)
+        self.restaurant_bits = {
+            restaurant_id: 1 << position
+            for position, restaurant_id in enumerate(self.restaurant_ids)
+        }
+        self.product_masks = {}
+        for product_id, restaurant_id in available_pairs:
+            self.product_masks[product_id] = (
+                self.product_masks.get(product_id, 0) | self.restaurant_bits[restaurant_id]
+            )
+
+    def has_restaurant(self, restaurant_id):
+        return restaurant_id in self.restaurant_bits
+
+    def is_available(self, product_id, restaurant_id):
+        return bool(
+            self.product_masks.get(product_id, 0) & self.restaurant_bits.get(restaurant_id, 0)
+        )
+
+    def decode(self, mask):
+        restaurant_ids = []
+        while mask:
+            lowest_bit = mask & -mask
+            restaurant_ids.append(self.restaurant_ids[lowest_bit.bit_length() - 1])
+            mask ^= lowest_bit
+        return restaurant_ids
+
+    def restaurants_for_product(self, product_id):
+        return self.decode(self.product_masks.get(product_id, 0))
+
+    def mask_for_products(self, product_ids):
+        # рестораны, где есть все товары заказа: пересечение масок, O(товаров)
+        mask = (1 << len(self.restaurant_ids)) - 1
+        for product_id in product_ids:
+            mask &= self.product_masks.get(product_id, 0)
+            if not mask:
+                break
+        return mask
+
+    def restaurants_for_products(self, product_ids):
+        return self.decode(self.mask_for_products(product_ids))
+
+
+def build_availability_bitmap(version):
+    restaurants = Restaurant.objects.order_by('id').values_list('id', 'name')
+    available_pairs = (
+        RestaurantMenuItem.objects
+        .filter(availability=True)
+        .values_list('product_id', 'restaurant_id')
+    )
+    return AvailabilityBitmap(version, restaurants, available_pairs)
+
+
+_bitmap = None
+
+
+def get_availability_bitmap(version):
+    global _bitmap
+    if _bitmap is None or _bitmap.version != version:
+        _bitmap = build_availability_bitmap(version)
+    return _bitmap
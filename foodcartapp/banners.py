@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import Banner
+from .responses import pack_json
+
+
+BANNERS_SNAPSHOT_KEY = 'banners:snapshot'
+BANNERS_MAX_AGE = 60 * 60
+
+
+def get_next_window_change(moment):
+    boundaries = Banner.objects.aggregate(
+        next_start=Min('active_from', filter=Q(active_from__gt=moment)),
+        next_end=Min('active_until', filter=Q(active_until__gt=moment)),
+    )
+    return min(filter(None, boundaries.values()), default=None)
+
+
+def build_banners_snapshot():
+    moment = timezone.now()
+    dumped_banners = [
+        {
+            'title': banner.title,
+            'src': banner.image.url,
+            'text': banner.text,
+        }
+        for banner in Banner.objects.active(moment)
+    ]
+    # ETag зависит только от содержимого, поэтому совпадает во всех процессах
+    snapshot = pack_json(dumped_banners, version=1)
+    snapshot['expires_at'] = get_next_window_change(moment)
+    cache.set(BANNERS_SNAPSHOT_KEY, snapshot, timeout=None)
+    return snapshot
+
+
+def get_banners_snapshot():
+    snapshot = cache.get(BANNERS_SNAPSHOT_KEY)
+    if snapshot is None or (snapshot['expires_at'] and snapshot['expires_at'] <= timezone.now()):
+        snapshot = build_banners_snapshot()
+    return snapshot
+
+
+def get_banners_max_age(snapshot):
+    if not snapshot['expires_at']:
+        return BANNERS_MAX_AGE
+    seconds_left = (snapshot['expires_at'] - timezone.now()).total_seconds()
+    return max(1, min(BANNERS_MAX_AGE, int(seconds_left)))
+
+
+def reset_banners_snapshot():
+    cache.delete(BANNERS_SNAPSHOT_KEY)
+
+
+def schedule_banners_reset():
+    transaction.on_commit(reset_banners_snapshot)
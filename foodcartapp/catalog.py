@@ -0,0 +1,122 @@
+from functools import partial
+from time import time_ns
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from .availability import get_availability_bitmap
+from .models import Product
+from .responses import pack_json
+
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_SNAPSHOT_KEY = 'catalog:snapshot'
+RESTAURANT_SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+
+def serialize_product(product, bitmap):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'price': product.price,
+        'special_status': product.special_status,
+        'description': product.description,
+        'category': {
+            'id': product.category.id,
+            'name': product.category.name,
+        } if product.category else None,
+        'image': product.image.url,
+        'image_srcset': product.get_image_srcset(),
+        'restaurants': [
+            {
+                'id': restaurant_id,
+                'name': bitmap.restaurant_names[restaurant_id],
+            }
+            for restaurant_id in bitmap.restaurants_for_product(product.id)
+        ],
+    }
+
+
+def new_catalog_version():
+    # версия — момент изменения в наносекундах: у двух одновременных правок
+    # версии разные, а если кэш потеряет версию, новая будет больше всех прежних,
+    # и процессы не примут старые снимки и битовые карты за свежие
+    return time_ns()
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, new_catalog_version(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY) or new_catalog_version()
+    return version
+
+
+def bump_catalog_version():
+    version = new_catalog_version()
+    cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+    return version
+
+
+def build_catalog_snapshot(version=None):
+    if version is None:
+        version = get_catalog_version()
+    bitmap = get_availability_bitmap(version)
+    products = Product.objects.select_related('category').available().order_by('id')
+    dumped_products = [serialize_product(product, bitmap) for product in products]
+
+    snapshot = pack_json(dumped_products, version)
+    snapshot['products'] = dumped_products
+    cache.set(CATALOG_SNAPSHOT_KEY, snapshot, timeout=None)
+    return snapshot
+
+
+def get_catalog_snapshot():
+    version = get_catalog_version()
+    snapshot = cache.get(CATALOG_SNAPSHOT_KEY)
+    if snapshot is None or snapshot['version'] != version:
+        snapshot = build_catalog_snapshot(version)
+    return snapshot
+
+
+def get_restaurant_catalog_snapshot(restaurant_id):
+    catalog = get_catalog_snapshot()
+    version = catalog['version']
+    snapshot_key = f'catalog:{version}:restaurant:{restaurant_id}'
+    snapshot = cache.get(snapshot_key)
+    if snapshot is None:
+        bitmap = get_availability_bitmap(version)
+        if not bitmap.has_restaurant(restaurant_id):
+            raise Http404('Ресторан не найден')
+        restaurant_products = [
+            product for product in catalog['products']
+            if bitmap.is_available(product['id'], restaurant_id)
+        ]
+        snapshot = pack_json(restaurant_products, version)
+        cache.set(snapshot_key, snapshot, timeout=RESTAURANT_SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def refresh_catalog_snapshot():
+    return build_catalog_snapshot(bump_catalog_version())
+
+
+def run_pending_catalog_refresh(pending):
+    if pending['done']:
+        return
+    pending['done'] = True
+    refresh_catalog_snapshot()
+
+
+def schedule_catalog_refresh():
+    # админка сохраняет товар вместе с инлайнами в одной транзакции, пересобираем
+    # каталог один раз после коммита: колбэки транзакции делят одну отметку,
+    # и работает только первый. Колбэки откатившейся транзакции не запустятся,
+    # её невыполненная отметка просто перейдёт к следующей транзакции
+    connection = transaction.get_connection()
+    pending = getattr(connection, 'pending_catalog_refresh', None)
+    if pending is None or pending['done']:
+        pending = {'done': False}
+        connection.pending_catalog_refresh = pending
+    transaction.on_commit(partial(run_pending_catalog_refresh, pending))
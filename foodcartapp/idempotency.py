@@ -0,0 +1,84 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def get_request_hash(data):
+    dumped_data = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(dumped_data.encode('utf-8')).hexdigest()
+
+
+def replay_response(stored_key, request_hash):
+    if stored_key.request_hash != request_hash:
+        return Response(
+            {'detail': 'Этот Idempotency-Key уже использован для другого запроса.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        stored_key.response_body,
+        status=stored_key.response_status,
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def idempotent(view):
+    # вызывать внутри transaction.atomic: при гонке двух повторов
+    # проигравший откатывает свой заказ и отдаёт ответ победителя
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {'detail': f'Idempotency-Key длиннее {IDEMPOTENCY_KEY_MAX_LENGTH} символов.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        now = timezone.now()
+        request_hash = get_request_hash(request.data)
+        stored_key = IdempotencyKey.objects.filter(key=key, expires_at__gt=now).first()
+        if stored_key:
+            return replay_response(stored_key, request_hash)
+
+        response = view(request, *args, **kwargs)
+        if not status.is_success(response.status_code):
+            return response
+
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.filter(key=key, expires_at__lte=now).delete()
+                IdempotencyKey.objects.create(
+                    key=key,
+                    request_hash=request_hash,
+                    response_status=response.status_code,
+                    response_body=response.data,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                )
+        except IntegrityError:
+            # ключ победителя читаем до отметки об откате: после set_rollback
+            # Django не пропустит ни одного запроса в этой транзакции
+            stored_key = IdempotencyKey.objects.get(key=key)
+            transaction.set_rollback(True)
+            return replay_response(stored_key, request_hash)
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys():
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,58 @@
+import logging
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANT_WIDTHS = [50, 200, 400]
+IMAGE_VARIANT_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+IMAGE_VARIANT_QUALITY = 80
+
+
+def get_variant_name(name, width, extension):
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}_{width}w.{extension}'))
+
+
+def flatten_to_rgb(picture):
+    if picture.mode in ('RGBA', 'LA', 'P'):
+        picture = picture.convert('RGBA')
+        background = Image.new('RGB', picture.size, 'white')
+        background.paste(picture, mask=picture.getchannel('A'))
+        return background
+    return picture.convert('RGB')
+
+
+def generate_image_variants(image):
+    try:
+        with image.open('rb'):
+            picture = Image.open(image)
+            picture.load()
+    except (OSError, UnidentifiedImageError):
+        logger.warning('Не удалось открыть картинку %s', image.name)
+        return {}
+
+    picture = flatten_to_rgb(ImageOps.exif_transpose(picture))
+    variants = {'source': image.name}
+    for extension, image_format in IMAGE_VARIANT_FORMATS.items():
+        variants[extension] = {}
+        for width in IMAGE_VARIANT_WIDTHS:
+            if width > picture.width and width != IMAGE_VARIANT_WIDTHS[0]:
+                break
+            resized = picture.copy()
+            resized.thumbnail((width, picture.height), Image.LANCZOS)
+            buffer = BytesIO()
+            resized.save(buffer, image_format, quality=IMAGE_VARIANT_QUALITY, optimize=True)
+
+            name = get_variant_name(image.name, width, extension)
+            if image.storage.exists(name):
+                image.storage.delete(name)
+            variants[extension][str(width)] = image.storage.save(name, ContentFile(buffer.getvalue()))
+    return variants
@@ -0,0 +1,110 @@
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import Order, OrderIntake, OrderItem, Product
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_intake_queue_enabled():
+    return settings.ORDER_INTAKE_MODE == 'queue'
+
+
+def is_intake_queue_full():
+    # очередь может быть длинной: не считаем её целиком, а проверяем одну строку на границе
+    max_depth = settings.ORDER_INTAKE_MAX_DEPTH
+    if max_depth <= 0:
+        return True
+    return OrderIntake.objects.order_by()[max_depth - 1:max_depth].exists()
+
+
+def enqueue_order(validated_data):
+    payload = {
+        'firstname': validated_data['firstname'],
+        'lastname': validated_data['lastname'],
+        'phonenumber': str(validated_data['phonenumber']),
+        'address': validated_data['address'],
+        'products': [
+            {
+                'product': item['product'].id,
+                'quantity': item['quantity'],
+                'price': str(item['product'].price),
+            }
+            for item in validated_data['products']
+        ],
+    }
+    return OrderIntake.objects.create(payload=payload)
+
+
+def drain_intake_queue(batch_size):
+    lock_options = {}
+    if connection.features.has_select_for_update_skip_locked:
+        # несколько воркеров разбирают очередь, не дожидаясь друг друга
+        lock_options['skip_locked'] = True
+
+    with transaction.atomic():
+        intakes = list(
+            OrderIntake.objects
+            .select_for_update(**lock_options)
+            .order_by('id')[:batch_size]
+        )
+        if not intakes:
+            return 0
+
+        # товар могли удалить, пока заказ ждал в очереди
+        existing_product_ids = set(
+            Product.objects
+            .filter(pk__in={item['product'] for intake in intakes for item in intake.payload['products']})
+            .values_list('pk', flat=True)
+        )
+
+        orders_with_items = []
+        for intake in intakes:
+            payload = intake.payload
+            order = Order(
+                firstname=payload['firstname'],
+                lastname=payload['lastname'],
+                phonenumber=payload['phonenumber'],
+                address=payload['address'],
+                registered_at=intake.created_at,
+            )
+            order_items = [
+                OrderItem(
+                    product_id=item['product'],
+                    quantity=item['quantity'],
+                    price=Decimal(item['price']),
+                )
+                for item in payload['products']
+                if item['product'] in existing_product_ids
+            ]
+            missing_product_ids = [
+                item['product'] for item in payload['products']
+                if item['product'] not in existing_product_ids
+            ]
+            if missing_product_ids:
+                # заказ всё равно сохраняем, чтобы менеджер связался с клиентом
+                ids = ', '.join(map(str, missing_product_ids))
+                order.comment = f'Товары удалены из меню, пока заказ ждал в очереди (id {ids}). Уточните заказ у клиента.'
+                logger.warning('Заказ из очереди приёма %s ссылается на удалённые товары: %s', intake.pk, ids)
+            orders_with_items.append((order, order_items))
+
+        Order.objects.bulk_register(orders_with_items)
+        OrderIntake.objects.filter(pk__in=[intake.pk for intake in intakes]).delete()
+
+    return len(intakes)
+
+
+def get_intake_queue_stats():
+    stats = OrderIntake.objects.aggregate(depth=Count('id'), oldest=Min('created_at'))
+    oldest_age = (timezone.now() - stats['oldest']).total_seconds() if stats['oldest'] else 0
+    return {
+        'depth': stats['depth'],
+        'oldest_age': oldest_age,
+        'max_depth': settings.ORDER_INTAKE_MAX_DEPTH,
+    }
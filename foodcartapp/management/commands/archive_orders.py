@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from foodcartapp.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = 'Переносит выполненные заказы старше заданного возраста в архив пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+            help='Возраст заказа в днях, после которого он уходит в архив',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза в секундах между пачками, чтобы не нагружать базу',
+        )
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(days=options['older_than_days'])
+        archived_total = 0
+        while True:
+            archived = archive_orders(older_than, options['batch_size'])
+            if not archived:
+                break
+            archived_total += archived
+            self.stdout.write(f'Перенесено в архив заказов: {archived_total}')
+            time.sleep(options['pause'])
+        self.stdout.write(f'Готово, перенесено заказов: {archived_total}')
@@ -0,0 +1,65 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodcartapp.models import Product, Restaurant, RestaurantMenuItem
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает план и время запроса доступных товаров: подзапрос по меню и счётчик availability_count'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--menu-items',
+            type=int,
+            default=0,
+            help='Сгенерировать столько пунктов меню для замера. Данные откатываются после замера',
+        )
+        parser.add_argument('--restaurants', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['menu_items']:
+                self.seed(options['menu_items'], options['restaurants'])
+
+            legacy_products = Product.objects.filter(
+                pk__in=RestaurantMenuItem.objects.filter(availability=True).values_list('product')
+            )
+            queries = [
+                ('Подзапрос по RestaurantMenuItem', legacy_products),
+                ('Product.objects.available()', Product.objects.available()),
+            ]
+            for title, products in queries:
+                products = products.values_list('pk', flat=True)
+                started_at = perf_counter()
+                found = len(list(products))
+                elapsed = perf_counter() - started_at
+
+                self.stdout.write(self.style.MIGRATE_HEADING(title))
+                self.stdout.write(products.explain())
+                self.stdout.write(f'товаров: {found}, время: {elapsed * 1000:.1f} мс\n\n')
+
+            transaction.set_rollback(True)
+
+    def seed(self, menu_items_count, restaurants_count):
+        products_count = max(menu_items_count // restaurants_count, 1)
+        restaurants = Restaurant.objects.bulk_create(
+            Restaurant(name=f'Ресторан {number}') for number in range(restaurants_count)
+        )
+        products = Product.objects.bulk_create(
+            Product(name=f'Товар {number}', price=100, image='')
+            for number in range(products_count)
+        )
+        menu_items = (
+            RestaurantMenuItem(
+                restaurant=restaurant,
+                product=product,
+                availability=random.random() < 0.1,
+            )
+            for restaurant in restaurants
+            for product in products
+        )
+        RestaurantMenuItem.objects.bulk_create(menu_items, batch_size=5000)
+        Product.objects.filter(pk__in=[product.pk for product in products]).recount_availability()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.images import generate_image_variants
+from foodcartapp.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные WebP/JPEG копии картинок товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии даже для товаров, у которых они уже есть',
+        )
+
+    def handle(self, *args, **options):
+        for product in Product.objects.exclude(image='').iterator():
+            if not options['force'] and product.image_variants.get('source') == product.image.name:
+                continue
+            product.image_variants = generate_image_variants(product.image)
+            product.save(update_fields=['image_variants'])
+            self.stdout.write(f'{product.name}: {product.image.name}')
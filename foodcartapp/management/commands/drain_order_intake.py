@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.intake import drain_intake_queue, get_intake_queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Переносит заказы из очереди приёма в таблицы Order и OrderItem пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, когда очередь опустела, а ждать новые заказы',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Пауза в секундах между проверками пустой очереди в режиме --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            saved = drain_intake_queue(options['batch_size'])
+            if saved:
+                stats = get_intake_queue_stats()
+                self.stdout.write(
+                    f'Сохранено заказов: {saved}, в очереди: {stats["depth"]}, '
+                    f'старейший ждёт {stats["oldest_age"]:.1f} с'
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
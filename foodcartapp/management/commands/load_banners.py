@@ -0,0 +1,34 @@
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Banner
+
+
+BANNERS = [
+    ('Burger', 'burger.jpg', 'Tasty Burger at your door step'),
+    ('Spices', 'food.jpg', 'All Cuisines'),
+    ('New York', 'tasty.jpg', 'Food is incomplete without a tasty dessert'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Заводит стартовые баннеры с картинками из assets/, если баннеров ещё нет'
+
+    def handle(self, *args, **options):
+        if Banner.objects.exists():
+            self.stdout.write('Баннеры уже есть, ничего не меняю')
+            return
+
+        for position, (title, filename, text) in enumerate(BANNERS):
+            path = os.path.join(settings.BASE_DIR, 'assets', filename)
+            if not os.path.exists(path):
+                self.stderr.write(f'Нет картинки {path}, баннер «{title}» пропущен')
+                continue
+            banner = Banner(title=title, text=text, position=position)
+            with open(path, 'rb') as image:
+                banner.image.save(filename, File(image), save=False)
+            banner.save()
+            self.stdout.write(f'Добавлен баннер «{title}»')
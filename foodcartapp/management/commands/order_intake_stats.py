@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.intake import get_intake_queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает глубину очереди приёма заказов'
+
+    def handle(self, *args, **options):
+        stats = get_intake_queue_stats()
+        self.stdout.write(
+            f'В очереди: {stats["depth"]} из {stats["max_depth"]}, '
+            f'старейший заказ ждёт {stats["oldest_age"]:.1f} с'
+        )
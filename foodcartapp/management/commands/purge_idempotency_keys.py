@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные ключи идемпотентности'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Удалено ключей: {purge_expired_keys()}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.catalog import refresh_catalog_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает снимок каталога товаров для /api/products/'
+
+    def handle(self, *args, **options):
+        snapshot = refresh_catalog_snapshot()
+        self.stdout.write(f'Каталог пересобран, версия {snapshot["version"]}')
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 19:42
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_product_availability(apps, schema_editor):
+    Product = apps.get_model('foodcartapp', 'Product')
+    RestaurantMenuItem = apps.get_model('foodcartapp', 'RestaurantMenuItem')
+    available_items = (
+        RestaurantMenuItem.objects
+        .filter(product=models.OuterRef('pk'), availability=True)
+        .order_by()
+        .values('product')
+        .annotate(count=models.Count('pk'))
+        .values('count')
+    )
+    Product.objects.update(
+        availability_count=Coalesce(models.Subquery(available_items), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0056_alter_orderitem_quantity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='availability_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='в продаже в ресторанах'),
+        ),
+        migrations.RunPython(count_product_availability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0057_product_availability_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='уменьшенные копии картинки'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0058_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Banner',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=50, verbose_name='заголовок')),
+                ('image', models.ImageField(upload_to='banners', verbose_name='картинка')),
+                ('text', models.CharField(blank=True, max_length=200, verbose_name='текст')),
+                ('position', models.PositiveIntegerField(db_index=True, default=0, verbose_name='порядок')),
+                ('active_from', models.DateTimeField(blank=True, null=True, verbose_name='показывать с')),
+                ('active_until', models.DateTimeField(blank=True, null=True, verbose_name='показывать до')),
+            ],
+            options={
+                'verbose_name': 'баннер',
+                'verbose_name_plural': 'баннеры',
+                'ordering': ['position', 'id'],
+            },
+        ),
+    ]
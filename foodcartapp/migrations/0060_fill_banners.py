@@ -0,0 +1,12 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # стартовые баннеры с картинками из assets/ заводит команда load_banners:
+    # миграция не копирует файлы в MEDIA_ROOT
+
+    dependencies = [
+        ('foodcartapp', '0059_banner'),
+    ]
+
+    operations = []
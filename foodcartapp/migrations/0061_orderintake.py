@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-18 19:46
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0060_fill_banners'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderIntake',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField(verbose_name='Данные заказа')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Принят')),
+            ],
+            options={
+                'verbose_name': 'Заказ в очереди',
+                'verbose_name_plural': 'Очередь заказов',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-18 19:47
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def calculate_total_cost(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    OrderItem = apps.get_model('foodcartapp', 'OrderItem')
+    items_cost = (
+        OrderItem.objects
+        .filter(order=models.OuterRef('pk'))
+        .order_by()
+        .values('order')
+        .annotate(cost=models.Sum(models.F('quantity') * models.F('price')))
+        .values('cost')
+    )
+    Order.objects.update(total_cost=Coalesce(models.Subquery(items_cost), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0062_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10, verbose_name='Стоимость заказа'),
+        ),
+        migrations.RunPython(calculate_total_cost, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-18 19:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0063_order_total_cost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='candidates_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Рестораны подобраны'),
+        ),
+        migrations.CreateModel(
+            name='OrderRestaurantCandidate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance', models.FloatField(blank=True, null=True, verbose_name='Расстояние, км')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidates', to='foodcartapp.order', verbose_name='Заказ')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_candidates', to='foodcartapp.restaurant', verbose_name='Ресторан')),
+            ],
+            options={
+                'verbose_name': 'Ресторан-кандидат',
+                'verbose_name_plural': 'Рестораны-кандидаты',
+                'ordering': [models.OrderBy(models.F('distance'), nulls_last=True)],
+                'unique_together': {('order', 'restaurant')},
+            },
+        ),
+    ]
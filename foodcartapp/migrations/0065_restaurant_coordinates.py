@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0064_orderrestaurantcandidate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='широта'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='долгота'),
+        ),
+    ]
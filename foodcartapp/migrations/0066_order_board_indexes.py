@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0065_restaurant_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['registered_at', 'id'], name='order_board_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'registered_at', 'id'], name='order_board_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['payment_type', 'registered_at', 'id'], name='order_board_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', 'registered_at', 'id'], name='order_board_restaurant_idx'),
+        ),
+    ]
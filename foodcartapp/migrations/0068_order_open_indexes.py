@@ -0,0 +1,53 @@
+# Generated by Django 4.2 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0067_orderevent'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='foodcartapp_phonenu_20923b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_board_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_board_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_board_payment_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_board_restaurant_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'DONE'), _negated=True), fields=['registered_at', 'id'], name='order_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'DONE'), _negated=True), fields=['status', 'registered_at', 'id'], name='order_open_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'DONE'), _negated=True), fields=['payment_type', 'registered_at', 'id'], name='order_open_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'DONE'), _negated=True), fields=['restaurant', 'registered_at', 'id'], name='order_open_restaurant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['phonenumber', '-registered_at'], name='order_phone_idx'),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 4.2 on 2026-10-18 20:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import phonenumber_field.modelfields
+
+
+# в Postgres архив секционируется по месяцам registered_at, секции создаёт
+# foodcartapp.archive.ensure_archive_partitions перед переносом заказов.
+# В остальных базах остаются обычные таблицы, созданные операциями выше
+PARTITIONED_ARCHIVE_SQL = [
+    'DROP TABLE foodcartapp_archivedorderitem',
+    'DROP TABLE foodcartapp_archivedorder',
+    '''
+    CREATE TABLE foodcartapp_archivedorder (
+        id integer NOT NULL,
+        status varchar(15) NOT NULL,
+        payment_type varchar(10) NOT NULL,
+        firstname varchar(30) NOT NULL,
+        lastname varchar(30) NOT NULL,
+        phonenumber varchar(128) NOT NULL,
+        address varchar(150) NOT NULL,
+        comment text NOT NULL,
+        restaurant_id integer NULL,
+        registered_at timestamp with time zone NOT NULL,
+        called_at timestamp with time zone NULL,
+        delivered_at timestamp with time zone NULL,
+        total_cost numeric(10, 2) NOT NULL,
+        archived_at timestamp with time zone NOT NULL,
+        PRIMARY KEY (id, registered_at)
+    ) PARTITION BY RANGE (registered_at)
+    ''',
+    '''
+    CREATE TABLE foodcartapp_archivedorderitem (
+        id integer NOT NULL,
+        order_id integer NOT NULL,
+        product_id integer NOT NULL,
+        quantity smallint NOT NULL CHECK (quantity >= 0),
+        price numeric(8, 2) NOT NULL,
+        registered_at timestamp with time zone NOT NULL,
+        PRIMARY KEY (id, registered_at)
+    ) PARTITION BY RANGE (registered_at)
+    ''',
+    'CREATE INDEX foodcartapp_archivedorder_restaurant_id ON foodcartapp_archivedorder (restaurant_id)',
+    'CREATE INDEX foodcartapp_archivedorderitem_order_id ON foodcartapp_archivedorderitem (order_id)',
+    'CREATE INDEX foodcartapp_archivedorderitem_product_id ON foodcartapp_archivedorderitem (product_id)',
+]
+
+
+def partition_archive_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in PARTITIONED_ARCHIVE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0068_order_open_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False, verbose_name='ID заказа')),
+                ('status', models.CharField(choices=[('CREATE', 'Создан'), ('PREPARE', 'Готовится'), ('DELIVER', 'Доставляется'), ('DONE', 'Выполнен')], max_length=15, verbose_name='Статус заказа')),
+                ('payment_type', models.CharField(choices=[('CASH', 'Наличные'), ('CARD', 'Карта')], max_length=10, verbose_name='Форма оплаты')),
+                ('firstname', models.CharField(max_length=30, verbose_name='Имя')),
+                ('lastname', models.CharField(max_length=30, verbose_name='Фамилия')),
+                ('phonenumber', phonenumber_field.modelfields.PhoneNumberField(max_length=128, region='RU', verbose_name='Телефон')),
+                ('address', models.CharField(max_length=150, verbose_name='Адрес')),
+                ('comment', models.TextField(blank=True, verbose_name='Комментарий')),
+                ('registered_at', models.DateTimeField(verbose_name='Создан')),
+                ('called_at', models.DateTimeField(blank=True, null=True, verbose_name='Звонок')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Доставлен')),
+                ('total_cost', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Стоимость заказа')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Перенесён в архив')),
+            ],
+            options={
+                'verbose_name': 'Архивный заказ',
+                'verbose_name_plural': 'Архив заказов',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False, verbose_name='ID элемента заказа')),
+                ('quantity', models.PositiveSmallIntegerField(verbose_name='Количество')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Цена товара')),
+                ('registered_at', models.DateTimeField(verbose_name='Заказ создан')),
+            ],
+            options={
+                'verbose_name': 'Элемент архивного заказа',
+                'verbose_name_plural': 'Элементы архивных заказов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'DONE')), fields=['registered_at'], name='order_done_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedorderitem',
+            name='order',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='items', to='foodcartapp.archivedorder', verbose_name='Заказ'),
+        ),
+        migrations.AddField(
+            model_name='archivedorderitem',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='foodcartapp.product', verbose_name='Товар'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='restaurant',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='foodcartapp.restaurant', verbose_name='Ресторан'),
+        ),
+        migrations.RunPython(partition_archive_tables, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['registered_at'], name='archived_order_registered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['phonenumber', '-registered_at'], name='archived_order_phone_idx'),
+        ),
+    ]
@@ -1,11 +1,14 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from phonenumber_field.modelfields import PhoneNumberField
 
 from location.models import Location
 
+from .images import generate_image_variants
+
 
 class Restaurant(models.Model):
     name = models.CharField(
@@ -22,6 +25,16 @@ class Restaurant(models.Model):
         max_length=50,
         blank=True,
     )
+    latitude = models.FloatField(
+        'широта',
+        blank=True,
+        null=True,
+    )
+    longitude = models.FloatField(
+        'долгота',
+        blank=True,
+        null=True,
+    )
 
     class Meta:
         verbose_name = 'ресторан'
@@ -30,15 +43,29 @@ class Restaurant(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def coordinates(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return self.latitude, self.longitude
+
 
 class ProductQuerySet(models.QuerySet):
     def available(self):
-        products = (
+        return self.filter(availability_count__gt=0)
+
+    def recount_availability(self):
+        available_items = (
             RestaurantMenuItem.objects
-            .filter(availability=True)
-            .values_list('product')
+            .filter(product=models.OuterRef('pk'), availability=True)
+            .order_by()
+            .values('product')
+            .annotate(count=models.Count('pk'))
+            .values('count')
+        )
+        return self.update(
+            availability_count=Coalesce(models.Subquery(available_items), 0)
         )
-        return self.filter(pk__in=products)
 
 
 class ProductCategory(models.Model):
@@ -77,6 +104,12 @@ class Product(models.Model):
     image = models.ImageField(
         'картинка'
     )
+    image_variants = models.JSONField(
+        'уменьшенные копии картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     special_status = models.BooleanField(
         'спец.предложение',
         default=False,
@@ -87,6 +120,12 @@ class Product(models.Model):
         max_length=200,
         blank=True,
     )
+    availability_count = models.PositiveIntegerField(
+        'в продаже в ресторанах',
+        default=0,
+        editable=False,
+        db_index=True,
+    )
 
     objects = ProductQuerySet.as_manager()
 
@@ -97,6 +136,34 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.image and not self.image._committed:
+            self.image.save(self.image.name, self.image.file, save=False)
+        if self.image and self.image_variants.get('source') != self.image.name:
+            self.image_variants = generate_image_variants(self.image)
+        super().save(*args, **kwargs)
+
+    def get_image_variant_url(self, width, extension='webp'):
+        variants = self.image_variants.get(extension)
+        if not variants:
+            return self.image.url if self.image else ''
+        suitable_widths = [int(variant) for variant in variants if int(variant) >= width]
+        variant_width = min(suitable_widths) if suitable_widths else max(map(int, variants))
+        return self.image.storage.url(variants[str(variant_width)])
+
+    def get_image_srcset(self):
+        return {
+            extension: ', '.join(
+                f'{self.image.storage.url(name)} {width}w' for width, name in variants.items()
+            )
+            for extension, variants in self.image_variants.items()
+            if extension != 'source'
+        }
+
+    @property
+    def thumbnail_url(self):
+        return self.get_image_variant_url(50)
+
 
 class RestaurantMenuItem(models.Model):
     restaurant = models.ForeignKey(
@@ -128,17 +195,92 @@ class RestaurantMenuItem(models.Model):
         return f"{self.restaurant.name} - {self.product.name}"
 
 
+class BannerQuerySet(models.QuerySet):
+    def active(self, moment=None):
+        moment = moment or timezone.now()
+        return self.filter(
+            models.Q(active_from__isnull=True) | models.Q(active_from__lte=moment),
+            models.Q(active_until__isnull=True) | models.Q(active_until__gt=moment),
+        )
+
+
+class Banner(models.Model):
+    title = models.CharField(
+        'заголовок',
+        max_length=50,
+    )
+    image = models.ImageField(
+        'картинка',
+        upload_to='banners',
+    )
+    text = models.CharField(
+        'текст',
+        max_length=200,
+        blank=True,
+    )
+    position = models.PositiveIntegerField(
+        'порядок',
+        default=0,
+        db_index=True,
+    )
+    active_from = models.DateTimeField(
+        'показывать с',
+        null=True,
+        blank=True,
+    )
+    active_until = models.DateTimeField(
+        'показывать до',
+        null=True,
+        blank=True,
+    )
+
+    objects = BannerQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'баннер'
+        verbose_name_plural = 'баннеры'
+        ordering = ['position', 'id']
+
+    def __str__(self):
+        return self.title
+
+
 class OrderQuerySet(models.QuerySet):
-    def with_cost_in_total(self):
-        # return Order.objects.annotate(
-        return self.prefetch_related('items', 'items__product').annotate(
-            total_cost=models.Sum(
-                models.F('items__quantity') * models.F('items__price')
-            ))
+    def bulk_register(self, orders_with_items):
+        for order, items in orders_with_items:
+            order.total_cost = sum(item.quantity * item.price for item in items)
+        orders = self.bulk_create([order for order, _ in orders_with_items])
+
+        order_items = []
+        for order, items in orders_with_items:
+            for item in items:
+                item.order = order
+                order_items.append(item)
+        OrderItem.objects.bulk_create(order_items)
+        OrderEvent.objects.publish([order.id for order in orders], OrderEvent.CREATED)
+
+        return orders
+
+    def recalculate_total_cost(self):
+        items_cost = (
+            OrderItem.objects
+            .filter(order=models.OuterRef('pk'))
+            .order_by()
+            .values('order')
+            .annotate(cost=models.Sum(models.F('quantity') * models.F('price')))
+            .values('cost')
+        )
+        return self.update(total_cost=Coalesce(models.Subquery(items_cost), 0))
 
     def available_restaurants(self):
         return Order.objects.annotate(available_restaurants=[])
 
+    def by_phonenumber(self, phonenumber):
+        return self.filter(phonenumber=phonenumber).order_by('-registered_at')
+
+    def awaiting_restaurant(self):
+        return self.exclude(status=Order.DONE).filter(restaurant__isnull=True)
+
 
 class Order(models.Model):
     CREATE = 'CREATE'
@@ -213,6 +355,19 @@ class Order(models.Model):
         null=True,
         verbose_name='Доставлен',
     )
+    total_cost = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name='Стоимость заказа',
+    )
+    candidates_updated_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Рестораны подобраны',
+    )
 
     objects = OrderQuerySet.as_manager()
 
@@ -220,14 +375,35 @@ class Order(models.Model):
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
         indexes = [
-            models.Index(fields=[
-                'phonenumber',
-                'status',
-                'registered_at',
-                'called_at',
-                'delivered_at',
-                'payment_type',
-            ])
+            # открытые заказы — малая часть таблицы, поэтому индексы доски заказов частичные:
+            # ключи постраничного вывода заказов менеджеру, см. restaurateur.board
+            models.Index(
+                fields=['registered_at', 'id'],
+                condition=~models.Q(status='DONE'),
+                name='order_open_idx',
+            ),
+            models.Index(
+                fields=['status', 'registered_at', 'id'],
+                condition=~models.Q(status='DONE'),
+                name='order_open_status_idx',
+            ),
+            models.Index(
+                fields=['payment_type', 'registered_at', 'id'],
+                condition=~models.Q(status='DONE'),
+                name='order_open_payment_idx',
+            ),
+            models.Index(
+                fields=['restaurant', 'registered_at', 'id'],
+                condition=~models.Q(status='DONE'),
+                name='order_open_restaurant_idx',
+            ),
+            models.Index(fields=['phonenumber', '-registered_at'], name='order_phone_idx'),
+            # выбор выполненных заказов для архивации, см. foodcartapp.archive
+            models.Index(
+                fields=['registered_at'],
+                condition=models.Q(status='DONE'),
+                name='order_done_idx',
+            ),
         ]
 
     def __str__(self):
@@ -264,3 +440,250 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f'{self.order}: {self.product} - {self.quantity}'
+
+
+class OrderRestaurantCandidate(models.Model):
+    order = models.ForeignKey(
+        Order,
+        related_name='candidates',
+        on_delete=models.CASCADE,
+        verbose_name='Заказ',
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        related_name='order_candidates',
+        on_delete=models.CASCADE,
+        verbose_name='Ресторан',
+    )
+    distance = models.FloatField(
+        blank=True,
+        null=True,
+        verbose_name='Расстояние, км',
+    )
+
+    class Meta:
+        verbose_name = 'Ресторан-кандидат'
+        verbose_name_plural = 'Рестораны-кандидаты'
+        ordering = [models.F('distance').asc(nulls_last=True)]
+        unique_together = [
+            ['order', 'restaurant']
+        ]
+
+    def __str__(self):
+        return f'{self.order_id}: {self.restaurant} - {self.distance}'
+
+
+class OrderIntake(models.Model):
+    payload = models.JSONField(
+        verbose_name='Данные заказа',
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Принят',
+    )
+
+    class Meta:
+        verbose_name = 'Заказ в очереди'
+        verbose_name_plural = 'Очередь заказов'
+
+    def __str__(self):
+        return f'{self.created_at} - {self.payload.get("firstname")} {self.payload.get("address")}'
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Ключ',
+    )
+    request_hash = models.CharField(
+        max_length=64,
+        verbose_name='Хэш запроса',
+    )
+    response_status = models.PositiveSmallIntegerField(
+        verbose_name='Код ответа',
+    )
+    response_body = models.JSONField(
+        verbose_name='Тело ответа',
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Создан',
+    )
+    expires_at = models.DateTimeField(
+        db_index=True,
+        verbose_name='Истекает',
+    )
+
+    class Meta:
+        verbose_name = 'Ключ идемпотентности'
+        verbose_name_plural = 'Ключи идемпотентности'
+
+    def __str__(self):
+        return self.key
+
+
+class OrderEventQuerySet(models.QuerySet):
+    def publish(self, order_ids, kind):
+        # событие пишется в той же транзакции, что и изменение заказа,
+        # поэтому при откате менеджеры о нём не узнают
+        return self.bulk_create(self.model(order_id=order_id, kind=kind) for order_id in order_ids)
+
+
+class OrderEvent(models.Model):
+    CREATED = 'created'
+    UPDATED = 'updated'
+    ASSIGNED = 'assigned'
+    KIND_CHOICES = [
+        (CREATED, 'Создан'),
+        (UPDATED, 'Изменён'),
+        (ASSIGNED, 'Назначен ресторан'),
+    ]
+
+    # без внешнего ключа: событие об удалении заказа тоже должно дойти до менеджеров
+    order_id = models.IntegerField(
+        verbose_name='ID заказа',
+    )
+    kind = models.CharField(
+        max_length=10,
+        choices=KIND_CHOICES,
+        verbose_name='Событие',
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Создано',
+    )
+
+    objects = OrderEventQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Событие заказа'
+        verbose_name_plural = 'События заказов'
+
+    def __str__(self):
+        return f'{self.created_at} - {self.order_id} {self.kind}'
+
+
+class ArchivedOrder(models.Model):
+    # копия выполненного заказа из Order. В Postgres таблица секционирована по месяцам
+    # registered_at, поэтому первичный ключ в базе составной — (id, registered_at)
+    id = models.IntegerField(
+        primary_key=True,
+        verbose_name='ID заказа',
+    )
+    status = models.CharField(
+        max_length=15,
+        choices=Order.STATE_CHOICES,
+        verbose_name='Статус заказа',
+    )
+    payment_type = models.CharField(
+        max_length=10,
+        choices=Order.PAYMENT_TYPE_CHOICES,
+        verbose_name='Форма оплаты',
+    )
+    firstname = models.CharField(
+        max_length=30,
+        verbose_name='Имя',
+    )
+    lastname = models.CharField(
+        max_length=30,
+        verbose_name='Фамилия',
+    )
+    phonenumber = PhoneNumberField(
+        region='RU',
+        verbose_name='Телефон',
+    )
+    address = models.CharField(
+        max_length=150,
+        verbose_name='Адрес',
+    )
+    comment = models.TextField(
+        blank=True,
+        verbose_name='Комментарий',
+    )
+    # без ограничения в базе: ресторан могут удалить, а история должна остаться
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Ресторан',
+    )
+    registered_at = models.DateTimeField(
+        verbose_name='Создан',
+    )
+    called_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Звонок',
+    )
+    delivered_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Доставлен',
+    )
+    total_cost = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Стоимость заказа',
+    )
+    archived_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Перенесён в архив',
+    )
+
+    class Meta:
+        verbose_name = 'Архивный заказ'
+        verbose_name_plural = 'Архив заказов'
+        indexes = [
+            models.Index(fields=['registered_at'], name='archived_order_registered_idx'),
+            models.Index(fields=['phonenumber', '-registered_at'], name='archived_order_phone_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.registered_at} - {self.firstname} {self.lastname} {self.address}'
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.IntegerField(
+        primary_key=True,
+        verbose_name='ID элемента заказа',
+    )
+    # в Postgres секционированные таблицы не ссылаются друг на друга внешними ключами
+    order = models.ForeignKey(
+        ArchivedOrder,
+        related_name='items',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name='Заказ',
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Товар',
+    )
+    quantity = models.PositiveSmallIntegerField(
+        verbose_name='Количество',
+    )
+    price = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        verbose_name='Цена товара',
+    )
+    # ключ секционирования, совпадает с registered_at заказа
+    registered_at = models.DateTimeField(
+        verbose_name='Заказ создан',
+    )
+
+    class Meta:
+        verbose_name = 'Элемент архивного заказа'
+        verbose_name_plural = 'Элементы архивных заказов'
+
+    def __str__(self):
+        return f'{self.order_id}: {self.product_id} - {self.quantity}'
@@ -0,0 +1,64 @@
+import gzip
+import hashlib
+import json
+
+import brotli
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+
+ENCODINGS = ['br', 'gzip']
+
+
+def pack_json(data, version):
+    body = json.dumps(
+        data,
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    return {
+        'version': version,
+        'etag': f'"{version}-{digest}"',
+        'body': body,
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        'br': brotli.compress(body, mode=brotli.MODE_TEXT),
+    }
+
+
+def choose_encoding(accept_encoding):
+    accepted = set()
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in ENCODINGS:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def packed_json_response(request, packed, max_age=0):
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    # у каждого сжатого варианта свой сильный ETag, как требует RFC 9110
+    etag = f'{packed["etag"][:-1]}-{encoding}"' if encoding else packed['etag']
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            packed[encoding] if encoding else packed['body'],
+            content_type='application/json',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if max_age:
+        patch_cache_control(response, public=True, max_age=max_age)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,160 @@
+import re
+from bisect import bisect_left
+from threading import Lock
+
+from .catalog import get_catalog_snapshot, get_catalog_version
+from .models import Product
+
+
+WORD_PATTERN = re.compile(r'\w+')
+TRIGRAM_SIZE = 3
+
+
+def normalize_text(text):
+    # casefold корректно работает с кириллицей, в отличие от LIKE в SQLite
+    return text.casefold().replace('ё', 'е')
+
+
+def tokenize(text):
+    return WORD_PATTERN.findall(normalize_text(text or ''))
+
+
+def get_trigrams(word):
+    return {word[index:index + TRIGRAM_SIZE] for index in range(len(word) - TRIGRAM_SIZE + 1)}
+
+
+class ProductSearchIndex:
+    def __init__(self):
+        self.version = None
+        self.documents = {}
+        self.product_words = {}
+        self.product_name_words = {}
+        self.word_products = {}
+        self.trigram_words = {}
+        self.sorted_words = []
+        self.available_products = {}
+
+    def add(self, product_id, document):
+        name, description, category_name = document
+        name_words = set(tokenize(name))
+        words = name_words | set(tokenize(description)) | set(tokenize(category_name))
+
+        self.documents[product_id] = document
+        self.product_name_words[product_id] = name_words
+        self.product_words[product_id] = words
+        for word in words:
+            if word not in self.word_products:
+                self.word_products[word] = set()
+                for trigram in get_trigrams(word):
+                    self.trigram_words.setdefault(trigram, set()).add(word)
+            self.word_products[word].add(product_id)
+
+    def remove(self, product_id):
+        self.documents.pop(product_id)
+        self.product_name_words.pop(product_id)
+        for word in self.product_words.pop(product_id):
+            products = self.word_products[word]
+            products.discard(product_id)
+            if products:
+                continue
+            del self.word_products[word]
+            for trigram in get_trigrams(word):
+                self.trigram_words[trigram].discard(word)
+                if not self.trigram_words[trigram]:
+                    del self.trigram_words[trigram]
+
+    def update(self, documents):
+        changed = False
+        for product_id in self.documents.keys() - documents.keys():
+            self.remove(product_id)
+            changed = True
+        for product_id, document in documents.items():
+            if self.documents.get(product_id) == document:
+                continue
+            if product_id in self.documents:
+                self.remove(product_id)
+            self.add(product_id, document)
+            changed = True
+        if changed:
+            self.sorted_words = sorted(self.word_products)
+
+    def find_words(self, token):
+        words = set()
+        position = bisect_left(self.sorted_words, token)
+        while position < len(self.sorted_words) and self.sorted_words[position].startswith(token):
+            words.add(self.sorted_words[position])
+            position += 1
+
+        if len(token) >= TRIGRAM_SIZE:
+            candidates = None
+            for trigram in get_trigrams(token):
+                trigram_words = self.trigram_words.get(trigram, set())
+                candidates = trigram_words if candidates is None else candidates & trigram_words
+                if not candidates:
+                    break
+            words.update(word for word in candidates or () if token in word)
+        return words
+
+    def search(self, query):
+        found_products = None
+        tokens = tokenize(query)
+        for token in tokens:
+            token_products = set()
+            for word in self.find_words(token):
+                token_products |= self.word_products[word]
+            found_products = token_products if found_products is None else found_products & token_products
+            if not found_products:
+                return []
+
+        def rank(product_id):
+            name_words = self.product_name_words[product_id]
+            name_hits = sum(
+                any(word.startswith(token) for word in name_words)
+                for token in tokens
+            )
+            return -name_hits, product_id
+
+        return sorted(found_products or (), key=rank)
+
+
+_index = ProductSearchIndex()
+_index_lock = Lock()
+
+
+def get_search_index():
+    version = get_catalog_version()
+    with _index_lock:
+        if _index.version != version:
+            # версия каталога меняется при любой правке товаров; перечитываем тексты
+            # одним запросом и переиндексируем только изменившиеся товары
+            documents = {
+                product_id: (name, description, category_name or '')
+                for product_id, name, description, category_name in (
+                    Product.objects.values_list('id', 'name', 'description', 'category__name')
+                )
+            }
+            _index.update(documents)
+            # выдача — товары из снимка каталога той же версии, разобранного один раз
+            _index.available_products = {
+                product['id']: product for product in get_catalog_snapshot()['products']
+            }
+            _index.version = version
+    return _index
+
+
+def search_products(query):
+    index = get_search_index()
+    with _index_lock:
+        return index.search(query)
+
+
+def search_available_products(query, limit):
+    index = get_search_index()
+    with _index_lock:
+        found_products = []
+        for product_id in index.search(query):
+            if len(found_products) >= limit:
+                break
+            if product_id in index.available_products:
+                found_products.append(index.available_products[product_id])
+        return found_products
@@ -1,10 +1,13 @@
 from django.db import transaction
 from rest_framework import serializers
 
-from .models import Order, OrderItem
+from .models import Order, OrderItem, Product
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
+    # товары всего заказа проверяются одним запросом в OrderSerializer.validate_products
+    product = serializers.IntegerField(min_value=1)
+
     class Meta:
         model = OrderItem
         fields = [
@@ -16,16 +19,38 @@ class OrderItemSerializer(serializers.ModelSerializer):
 class OrderSerializer(serializers.ModelSerializer):
     products = OrderItemSerializer(many=True, allow_empty=False, write_only=True)
 
+    def validate_products(self, products_items):
+        product_ids = {item['product'] for item in products_items}
+        products = Product.objects.only('id', 'price').in_bulk(product_ids)
+
+        # то же сообщение, что у PrimaryKeyRelatedField, на языке запроса
+        does_not_exist = serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+        errors = [
+            {} if item['product'] in products else {
+                'product': [does_not_exist.format(pk_value=item['product'])],
+            }
+            for item in products_items
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        for item in products_items:
+            item['product'] = products[item['product']]
+        return products_items
+
     def create(self, validated_data):
         products_items = validated_data.pop('products')
-        for item in products_items:
-            item['price'] = item['product'].price
+        order = Order(**validated_data)
+        order_items = [
+            OrderItem(product=item['product'], quantity=item['quantity'], price=item['product'].price)
+            for item in products_items
+        ]
+        # рестораны для заказа подбирает воркер refresh_order_candidates:
+        # геокодирование не должно задерживать ответ покупателю
         with transaction.atomic():
-            order = Order.objects.create(**validated_data)
-            order_items = [OrderItem(order=order, **item) for item in products_items]
-            OrderItem.objects.bulk_create(order_items)
+            Order.objects.bulk_register([(order, order_items)])
 
-            return order
+        return order
 
     class Meta:
         model = Order
@@ -0,0 +1,111 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .banners import schedule_banners_reset
+from .catalog import schedule_catalog_refresh
+from .models import Banner, Order, OrderEvent, OrderItem, Product, ProductCategory, Restaurant, RestaurantMenuItem
+
+
+# админка сообщает, что у ресторана нужно обновить координаты, а геокодирует
+# приложение restaurateur: foodcartapp от него не зависит
+restaurant_address_changed = Signal()
+
+
+@receiver(pre_save, sender=RestaurantMenuItem)
+def remember_menu_item_product(sender, instance, **kwargs):
+    instance.previous_product_id = (
+        RestaurantMenuItem.objects
+        .filter(pk=instance.pk)
+        .values_list('product_id', flat=True)
+        .first()
+    ) if instance.pk else None
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def recount_product_availability(sender, instance, **kwargs):
+    product_ids = {instance.product_id, getattr(instance, 'previous_product_id', None)}
+    product_ids.discard(None)
+    Product.objects.filter(pk__in=product_ids).recount_availability()
+
+
+@receiver(post_save, sender=Product)
+def recount_saved_product_availability(sender, instance, update_fields, **kwargs):
+    # save() записал availability_count, прочитанный до изменений меню,
+    # а у копии товара — счётчик оригинала: пересчитываем по меню
+    if update_fields is not None and 'availability_count' not in update_fields:
+        return
+    Product.objects.filter(pk=instance.pk).recount_availability()
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def mark_order_candidates_stale(sender, instance, **kwargs):
+    product_ids = {instance.product_id, getattr(instance, 'previous_product_id', None)}
+    product_ids.discard(None)
+    (
+        Order.objects
+        .awaiting_restaurant()
+        .filter(items__product__in=product_ids)
+        .update(candidates_updated_at=None)
+    )
+
+
+@receiver(post_save, sender=Restaurant)
+def mark_all_order_candidates_stale(sender, **kwargs):
+    Order.objects.awaiting_restaurant().update(candidates_updated_at=None)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def on_catalog_changed(sender, **kwargs):
+    schedule_catalog_refresh()
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def on_banner_changed(sender, **kwargs):
+    schedule_banners_reset()
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def recalculate_order_total_cost(sender, instance, **kwargs):
+    Order.objects.filter(pk=instance.order_id).recalculate_total_cost()
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_restaurant(sender, instance, **kwargs):
+    instance.previous_restaurant_id = (
+        Order.objects
+        .filter(pk=instance.pk)
+        .values_list('restaurant_id', flat=True)
+        .first()
+    ) if instance.pk else None
+
+
+@receiver(post_save, sender=Order)
+def publish_order_changed(sender, instance, created, **kwargs):
+    # о новых заказах сообщает Order.objects.bulk_register
+    if created:
+        return
+    if instance.restaurant_id != getattr(instance, 'previous_restaurant_id', None):
+        kind = OrderEvent.ASSIGNED
+    else:
+        kind = OrderEvent.UPDATED
+    OrderEvent.objects.publish([instance.pk], kind)
+
+
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def publish_order_updated(sender, instance, **kwargs):
+    order_id = instance.pk if sender is Order else instance.order_id
+    OrderEvent.objects.publish([order_id], OrderEvent.UPDATED)
+
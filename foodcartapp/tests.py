@@ -0,0 +1,641 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone, translation
+from PIL import Image
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from .archive import archive_orders
+from .availability import AvailabilityBitmap
+from .catalog import CATALOG_VERSION_KEY, bump_catalog_version, get_catalog_version
+from .idempotency import get_request_hash, idempotent
+from .intake import drain_intake_queue, is_intake_queue_full
+from .models import (
+    ArchivedOrder,
+    ArchivedOrderItem,
+    Banner,
+    IdempotencyKey,
+    Order,
+    OrderIntake,
+    OrderItem,
+    Product,
+    Restaurant,
+    RestaurantMenuItem,
+)
+from .search import ProductSearchIndex
+from .serializers import OrderSerializer
+
+
+ORDER_PAYLOAD = {
+    'firstname': 'Иван',
+    'lastname': 'Иванов',
+    'phonenumber': '+79291000000',
+    'address': 'Москва, Тверская, 1',
+}
+
+
+class IdempotencyKeyTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name='Товар', price=100, image='')
+
+    def post_order(self, key, **payload):
+        payload = {**ORDER_PAYLOAD, 'products': [{'product': self.product.id, 'quantity': 1}], **payload}
+        return self.client.post('/api/order/', payload, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_stored_response(self):
+        first_response = self.post_order('retry-key')
+        retry_response = self.post_order('retry-key')
+
+        self.assertEqual(first_response.status_code, 200)
+        self.assertEqual(retry_response.status_code, 200)
+        self.assertEqual(retry_response.json(), first_response.json())
+        self.assertEqual(retry_response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_another_request(self):
+        self.post_order('reused-key')
+        response = self.post_order('reused-key', firstname='Пётр')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_losing_retry_replays_winner_response(self):
+        # победитель сохраняет ключ между проверкой ключа и вставкой проигравшего
+        payload = {'order': 1}
+
+        @api_view(['POST'])
+        @transaction.atomic()
+        @idempotent
+        def racing_view(request):
+            Order.objects.create(**ORDER_PAYLOAD)
+            now = timezone.now()
+            IdempotencyKey.objects.create(
+                key='race-key',
+                request_hash=get_request_hash(request.data),
+                response_status=200,
+                response_body={'winner': True},
+                created_at=now,
+                expires_at=now + timedelta(days=1),
+            )
+            return Response({'winner': False})
+
+        request = APIRequestFactory().post('/api/order/', payload, format='json', HTTP_IDEMPOTENCY_KEY='race-key')
+        response = racing_view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'winner': True})
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertFalse(Order.objects.exists())
+
+
+class RegisterOrderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name='Товар', price=100, image='')
+
+    def test_order_response_does_not_wait_for_candidates(self):
+        payload = {**ORDER_PAYLOAD, 'products': [{'product': self.product.id, 'quantity': 2}]}
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post('/api/order/', payload, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(callbacks, [])
+        order = Order.objects.get()
+        self.assertIsNone(order.candidates_updated_at)
+        self.assertEqual(order.total_cost, 200)
+
+
+@override_settings(ORDER_INTAKE_MODE='queue', ORDER_INTAKE_MAX_DEPTH=2)
+class OrderIntakeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [
+            Product.objects.create(name=f'Товар {number}', price=100, image='')
+            for number in range(2)
+        ]
+
+    def post_order(self, *products):
+        payload = {**ORDER_PAYLOAD, 'products': [{'product': product.id, 'quantity': 1} for product in products]}
+        return self.client.post('/api/order/', payload, content_type='application/json')
+
+    def test_orders_are_queued_until_queue_is_full(self):
+        self.assertEqual(self.post_order(self.products[0]).status_code, 202)
+        self.assertFalse(is_intake_queue_full())
+        self.assertEqual(self.post_order(self.products[0]).status_code, 202)
+        self.assertTrue(is_intake_queue_full())
+
+        # переполненная очередь не теряет заказы: они сохраняются сразу
+        self.assertEqual(self.post_order(self.products[0]).status_code, 200)
+        self.assertEqual(OrderIntake.objects.count(), 2)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_drain_registers_queued_orders(self):
+        self.post_order(*self.products)
+        self.post_order(self.products[0])
+
+        self.assertEqual(drain_intake_queue(batch_size=10), 2)
+
+        self.assertFalse(OrderIntake.objects.exists())
+        self.assertEqual(
+            sorted(Order.objects.values_list('total_cost', flat=True)),
+            [100, 200],
+        )
+        self.assertFalse(Order.objects.exclude(comment='').exists())
+
+    def test_drain_flags_order_with_deleted_products(self):
+        self.post_order(*self.products)
+        deleted_product_id = self.products[1].id
+        self.products[1].delete()
+
+        with self.assertLogs('foodcartapp.intake', level='WARNING'):
+            drain_intake_queue(batch_size=10)
+
+        order = Order.objects.get()
+        self.assertEqual(order.total_cost, 100)
+        self.assertEqual(list(order.items.values_list('product_id', flat=True)), [self.products[0].id])
+        self.assertIn(f'id {deleted_product_id}', order.comment)
+
+
+class CatalogApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+        cls.product = Product.objects.create(name='Бургер', price=100, image='burger.jpg')
+        Product.objects.create(name='Нет в меню', price=100, image='burger.jpg')
+        RestaurantMenuItem.objects.create(restaurant=cls.restaurant, product=cls.product)
+
+    def test_catalog_lists_available_products(self):
+        response = self.client.get('/api/products/')
+
+        self.assertEqual(response.status_code, 200)
+        products = json.loads(response.content)
+        self.assertEqual([product['name'] for product in products], ['Бургер'])
+        self.assertEqual(products[0]['restaurants'], [{'id': self.restaurant.id, 'name': 'Ресторан'}])
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get('/api/products/')
+        etag = response['ETag']
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_compressed_body_has_own_etag(self):
+        plain_response = self.client.get('/api/products/')
+        gzip_response = self.client.get('/api/products/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(gzip_response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(gzip_response.content), plain_response.content)
+        self.assertNotEqual(gzip_response['ETag'], plain_response['ETag'])
+        self.assertIn('Accept-Encoding', gzip_response['Vary'])
+
+    def test_warm_catalog_only_reads_cache(self):
+        self.client.get('/api/products/')
+        # версия и снимок — по одному SELECT из таблицы кэша, без записей
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/products/')
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries))
+
+
+class BannersApiTest(TestCase):
+    def test_only_active_banners_are_served_until_next_window(self):
+        now = timezone.now()
+        Banner.objects.create(title='Сейчас', image='banners/now.jpg', text='', position=0)
+        Banner.objects.create(
+            title='Завтра', image='banners/tomorrow.jpg', text='', position=1,
+            active_from=now + timedelta(minutes=10),
+        )
+        Banner.objects.create(
+            title='Вчера', image='banners/yesterday.jpg', text='', position=2,
+            active_until=now - timedelta(minutes=10),
+        )
+
+        response = self.client.get('/api/banners/')
+
+        self.assertEqual([banner['title'] for banner in json.loads(response.content)], ['Сейчас'])
+        max_age = int(response['Cache-Control'].split('max-age=')[1])
+        self.assertLessEqual(max_age, 10 * 60)
+
+
+class LoadBannersCommandTest(TestCase):
+    def test_banners_are_loaded_once(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+
+        with override_settings(MEDIA_ROOT=media_root):
+            call_command('load_banners', stdout=StringIO())
+            call_command('load_banners', stdout=StringIO())
+
+            self.assertEqual(list(Banner.objects.values_list('title', flat=True)), ['Burger', 'Spices', 'New York'])
+            for banner in Banner.objects.all():
+                self.assertTrue(banner.image.storage.exists(banner.image.name))
+
+
+class CatalogRefreshTest(TransactionTestCase):
+    # каталог пересобирается в on_commit, поэтому здесь нужны настоящие коммиты
+    def tearDown(self):
+        cache.clear()
+
+    def test_product_change_refreshes_catalog(self):
+        restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+        product = Product.objects.create(name='Бургер', price=100, image='burger.jpg')
+        RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+        etag = self.client.get('/api/products/')['ETag']
+
+        product.name = 'Чизбургер'
+        product.save()
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)[0]['name'], 'Чизбургер')
+
+    def test_catalog_is_refreshed_once_per_transaction(self):
+        with patch('foodcartapp.catalog.refresh_catalog_snapshot') as refresh_catalog_snapshot:
+            with transaction.atomic():
+                restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+                product = Product.objects.create(name='Бургер', price=100, image='burger.jpg')
+                RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+            self.assertEqual(refresh_catalog_snapshot.call_count, 1)
+
+            try:
+                with transaction.atomic():
+                    product.save()
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            self.assertEqual(refresh_catalog_snapshot.call_count, 1)
+
+            # отметка откатившейся транзакции не мешает следующей
+            with transaction.atomic():
+                product.save()
+            self.assertEqual(refresh_catalog_snapshot.call_count, 2)
+
+    def test_lost_version_is_seeded_above_old_ones(self):
+        old_version = bump_catalog_version()
+        cache.delete(CATALOG_VERSION_KEY)
+        self.assertGreater(get_catalog_version(), old_version)
+        self.assertGreater(bump_catalog_version(), old_version)
+
+
+class OrderArchiveTest(TestCase):
+    def test_archive_moves_old_done_orders_in_batches(self):
+        product = Product.objects.create(name='Товар', price=100, image='')
+        now = timezone.now()
+        orders = Order.objects.bulk_create(
+            Order(
+                firstname='Иван',
+                lastname='Иванов',
+                phonenumber='+79291000000',
+                address='Москва',
+                status=status,
+                registered_at=now - timedelta(days=days),
+                total_cost=200,
+            )
+            for status, days in [
+                (Order.DONE, 100),
+                (Order.DONE, 95),
+                (Order.DONE, 40),
+                (Order.DELIVER, 100),
+                (Order.DONE, 120),
+            ]
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=2, price=100)
+            for order in orders
+        )
+        older_than = now - timedelta(days=90)
+
+        self.assertEqual(archive_orders(older_than, batch_size=2), 2)
+        self.assertEqual(archive_orders(older_than, batch_size=2), 1)
+        self.assertEqual(archive_orders(older_than, batch_size=2), 0)
+
+        archived_ids = {orders[0].id, orders[1].id, orders[4].id}
+        self.assertEqual(set(ArchivedOrder.objects.values_list('id', flat=True)), archived_ids)
+        self.assertEqual(set(ArchivedOrderItem.objects.values_list('order_id', flat=True)), archived_ids)
+        self.assertEqual(set(Order.objects.values_list('id', flat=True)), {orders[2].id, orders[3].id})
+        self.assertEqual(OrderItem.objects.count(), 2)
+        self.assertEqual(ArchivedOrder.objects.get(pk=orders[0].id).items.get().product, product)
+
+    @skipUnless(connection.vendor == 'postgresql', 'архив разбит на секции только в PostgreSQL')
+    def test_archive_is_partitioned_by_month(self):
+        product = Product.objects.create(name='Товар', price=100, image='')
+        order = Order.objects.create(
+            firstname='Иван',
+            lastname='Иванов',
+            phonenumber='+79291000000',
+            address='Москва',
+            status=Order.DONE,
+            registered_at=datetime(2024, 3, 15, tzinfo=dt_timezone.utc),
+        )
+        OrderItem.objects.create(order=order, product=product, quantity=1, price=100)
+
+        archive_orders(timezone.now(), batch_size=10)
+
+        with connection.cursor() as cursor:
+            for table in ('foodcartapp_archivedorder', 'foodcartapp_archivedorderitem'):
+                cursor.execute('SELECT relkind FROM pg_class WHERE relname = %s', [table])
+                self.assertEqual(cursor.fetchone(), ('p',))
+                cursor.execute(
+                    'SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = %s::regclass',
+                    [table],
+                )
+                self.assertEqual(cursor.fetchall(), [(f'{table}_y2024m03',)])
+                cursor.execute(f'SELECT count(*) FROM {table}_y2024m03')
+                self.assertEqual(cursor.fetchone(), (1,))
+
+
+class ProductAvailabilityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurants = [Restaurant.objects.create(name=f'Ресторан {number}', address='Адрес') for number in range(2)]
+        cls.product = Product.objects.create(name='Товар', price=100, image='')
+
+    def get_availability_count(self):
+        return Product.objects.get(pk=self.product.pk).availability_count
+
+    def test_menu_changes_update_counter(self):
+        first_item = RestaurantMenuItem.objects.create(restaurant=self.restaurants[0], product=self.product)
+        RestaurantMenuItem.objects.create(restaurant=self.restaurants[1], product=self.product)
+        self.assertEqual(self.get_availability_count(), 2)
+
+        first_item.availability = False
+        first_item.save()
+        self.assertEqual(self.get_availability_count(), 1)
+
+        RestaurantMenuItem.objects.filter(restaurant=self.restaurants[1]).get().delete()
+        self.assertEqual(self.get_availability_count(), 0)
+        self.assertFalse(Product.objects.available().exists())
+
+    def test_moved_menu_item_recounts_both_products(self):
+        other_product = Product.objects.create(name='Другой товар', price=100, image='')
+        item = RestaurantMenuItem.objects.create(restaurant=self.restaurants[0], product=self.product)
+
+        item.product = other_product
+        item.save()
+
+        self.assertEqual(self.get_availability_count(), 0)
+        self.assertEqual(Product.objects.get(pk=other_product.pk).availability_count, 1)
+
+    def test_product_save_keeps_counter(self):
+        RestaurantMenuItem.objects.create(restaurant=self.restaurants[0], product=self.product)
+        self.product.name = 'Новое название'
+        self.product.save()
+        self.assertEqual(self.get_availability_count(), 1)
+
+    def test_copied_product_starts_unavailable(self):
+        RestaurantMenuItem.objects.create(restaurant=self.restaurants[0], product=self.product)
+        product = Product.objects.get(pk=self.product.pk)
+
+        product.pk = None
+        product.save()
+
+        self.assertEqual(Product.objects.get(pk=product.pk).availability_count, 0)
+        self.assertEqual(self.get_availability_count(), 1)
+
+    def test_recount_availability(self):
+        RestaurantMenuItem.objects.create(restaurant=self.restaurants[0], product=self.product)
+        Product.objects.update(availability_count=5)
+        Product.objects.recount_availability()
+        self.assertEqual(self.get_availability_count(), 1)
+
+
+class AvailabilityBitmapTest(SimpleTestCase):
+    def setUp(self):
+        self.bitmap = AvailabilityBitmap(
+            version=1,
+            restaurants=[(1, 'Первый'), (2, 'Второй'), (3, 'Третий')],
+            available_pairs=[(10, 1), (10, 2), (11, 2), (11, 3), (12, 3)],
+        )
+
+    def test_product_restaurants(self):
+        self.assertTrue(self.bitmap.is_available(10, 2))
+        self.assertFalse(self.bitmap.is_available(10, 3))
+        self.assertFalse(self.bitmap.is_available(10, 4))
+        self.assertEqual(self.bitmap.restaurants_for_product(11), [2, 3])
+        self.assertEqual(self.bitmap.restaurants_for_product(13), [])
+
+    def test_restaurants_with_all_products(self):
+        self.assertEqual(self.bitmap.restaurants_for_products([10, 11]), [2])
+        self.assertEqual(self.bitmap.restaurants_for_products([10, 12]), [])
+        self.assertEqual(self.bitmap.restaurants_for_products([]), [1, 2, 3])
+
+
+class RestaurantMenuApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurants = [Restaurant.objects.create(name=f'Ресторан {number}', address='Адрес') for number in range(2)]
+        for name, restaurants in [('Бургер', cls.restaurants), ('Салат', cls.restaurants[1:])]:
+            product = Product.objects.create(name=name, price=100, image='burger.jpg')
+            for restaurant in restaurants:
+                RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+
+    def get_menu(self, restaurant_id):
+        return self.client.get(f'/api/restaurants/{restaurant_id}/products/')
+
+    def get_menu_names(self, restaurant):
+        return [product['name'] for product in json.loads(self.get_menu(restaurant.id).content)]
+
+    def test_menu_has_only_restaurant_products(self):
+        self.assertEqual(self.get_menu_names(self.restaurants[0]), ['Бургер'])
+        self.assertEqual(self.get_menu_names(self.restaurants[1]), ['Бургер', 'Салат'])
+
+    def test_unknown_restaurant(self):
+        self.assertEqual(self.get_menu(999999).status_code, 404)
+
+
+class ImageVariantsTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_image(self, width, height):
+        buffer = BytesIO()
+        Image.new('RGBA', (width, height), (255, 0, 0, 128)).save(buffer, 'PNG')
+        return SimpleUploadedFile('burger.png', buffer.getvalue())
+
+    def test_variants_are_built_on_save(self):
+        product = Product.objects.create(name='Товар', price=100, image=self.make_image(300, 200))
+
+        self.assertEqual(product.image_variants['source'], product.image.name)
+        for extension in ('webp', 'jpeg'):
+            # картинку не увеличиваем: 400 шире исходника
+            self.assertEqual(list(product.image_variants[extension]), ['50', '200'])
+        self.assertTrue(product.get_image_variant_url(100).endswith('burger_200w.webp'))
+        self.assertTrue(product.get_image_variant_url(1000, 'jpeg').endswith('burger_200w.jpeg'))
+        self.assertTrue(product.thumbnail_url.endswith('burger_50w.webp'))
+        with Image.open(product.image.storage.path(product.image_variants['jpeg']['50'])) as picture:
+            self.assertEqual(picture.size, (50, 33))
+
+    def test_variants_are_kept_until_image_changes(self):
+        product = Product.objects.create(name='Товар', price=100, image=self.make_image(300, 200))
+        variants = product.image_variants
+        product.name = 'Новое название'
+        product.save()
+        self.assertEqual(product.image_variants, variants)
+
+    def test_broken_image_has_no_variants(self):
+        with self.assertLogs('foodcartapp.images', level='WARNING'):
+            product = Product.objects.create(
+                name='Товар', price=100, image=SimpleUploadedFile('burger.png', b'not an image'),
+            )
+        self.assertEqual(product.image_variants, {})
+        self.assertEqual(product.thumbnail_url, product.image.url)
+
+
+class ProductSearchTest(SimpleTestCase):
+    def setUp(self):
+        self.index = ProductSearchIndex()
+        self.index.update({
+            1: ('Чизбургер', 'Булочка, котлета и сыр', 'Бургеры'),
+            2: ('Ёжик в тумане', 'Десерт с сыром', 'Десерты'),
+            3: ('Картофель фри', '', ''),
+        })
+
+    def test_prefix_and_substring_search(self):
+        self.assertEqual(self.index.search('чиз'), [1])
+        self.assertEqual(self.index.search('бургер'), [1])
+        self.assertEqual(self.index.search('ежик'), [2])
+        self.assertEqual(self.index.search('фри картоф'), [3])
+        self.assertEqual(self.index.search('пицца'), [])
+
+    def test_name_matches_go_first(self):
+        self.index.update({
+            **self.index.documents,
+            4: ('Сырники', '', 'Десерты'),
+        })
+        self.assertEqual(self.index.search('сыр'), [4, 1, 2])
+
+    def test_update_drops_removed_and_changed_products(self):
+        self.index.update({
+            1: ('Гамбургер', 'Булочка и котлета', 'Бургеры'),
+            3: ('Картофель фри', '', ''),
+        })
+        self.assertEqual(self.index.search('чиз'), [])
+        self.assertEqual(self.index.search('гамб'), [1])
+        self.assertEqual(self.index.search('ежик'), [])
+        self.assertNotIn('ежик', self.index.word_products)
+
+
+class ProductSearchApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+        for name in ['Чизбургер', 'Гамбургер', 'Бургер дня']:
+            product = Product.objects.create(name=name, price=100, image='burger.jpg')
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+        Product.objects.create(name='Бургер не в продаже', price=100, image='')
+
+    def search(self, **params):
+        response = self.client.get('/api/products/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [product['name'] for product in response.json()]
+
+    def test_only_available_products_are_found(self):
+        self.assertEqual(self.search(q='бургер'), ['Бургер дня', 'Чизбургер', 'Гамбургер'])
+
+    def test_limit(self):
+        self.assertEqual(len(self.search(q='бургер', limit=2)), 2)
+        self.assertEqual(len(self.search(q='бургер', limit='много')), 3)
+        # отрицательный limit в срезе отрезал бы результаты с конца
+        self.assertEqual(self.search(q='бургер', limit=-1), [])
+
+    def test_warm_search_only_reads_catalog_version(self):
+        self.search(q='бургер')
+        with self.assertNumQueries(1):
+            self.search(q='чиз')
+
+    def test_admin_search_finds_unavailable_products(self):
+        admin = User.objects.create_superuser('admin')
+        self.client.force_login(admin)
+        response = self.client.get('/admin/foodcartapp/product/', {'q': 'не в продаже'})
+        self.assertContains(response, 'Бургер не в продаже')
+
+    def test_catalog_change_reaches_search(self):
+        product = Product.objects.get(name='Гамбургер')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = 'Гамбургер с сыром'
+            product.save()
+        self.assertEqual(self.search(q='сыр'), ['Гамбургер с сыром'])
+
+
+class OrderProductsValidationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [
+            Product.objects.create(name=f'Товар {number}', price=100 + number, image='')
+            for number in range(3)
+        ]
+
+    def test_products_are_loaded_with_one_query(self):
+        serializer = OrderSerializer(data={
+            **ORDER_PAYLOAD,
+            'products': [{'product': product.id, 'quantity': 1} for product in self.products],
+        })
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual([item['product'] for item in serializer.validated_data['products']], self.products)
+
+    def test_unknown_products_are_reported_per_item(self):
+        serializer = OrderSerializer(data={
+            **ORDER_PAYLOAD,
+            'products': [{'product': self.products[0].id, 'quantity': 1}, {'product': 999999, 'quantity': 1}],
+        })
+        self.assertFalse(serializer.is_valid())
+        errors = serializer.errors['products']
+        self.assertEqual(errors[0], {})
+        self.assertIn('999999', str(errors[1]['product'][0]))
+
+    def test_error_message_follows_active_language(self):
+        data = {**ORDER_PAYLOAD, 'products': [{'product': 999999, 'quantity': 1}]}
+        for language, message in [('en', 'Invalid pk "999999"'), ('ru', 'Недопустимый первичный ключ "999999"')]:
+            with translation.override(language):
+                serializer = OrderSerializer(data=data)
+                serializer.is_valid()
+                self.assertIn(message, str(serializer.errors['products'][0]['product'][0]))
+
+
+class OrderTotalCostTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name='Товар', price=100, image='')
+
+    def test_total_cost_follows_items(self):
+        order = Order.objects.create(firstname='Иван', lastname='Иванов', phonenumber='+79291000000', address='Москва')
+        item = OrderItem.objects.create(order=order, product=self.product, quantity=2, price=100)
+        OrderItem.objects.create(order=order, product=self.product, quantity=1, price=50)
+        order.refresh_from_db()
+        self.assertEqual(order.total_cost, 250)
+
+        item.delete()
+        order.refresh_from_db()
+        self.assertEqual(order.total_cost, 50)
+
+    def test_recalculate_total_cost(self):
+        order = Order.objects.create(firstname='Иван', lastname='Иванов', phonenumber='+79291000000', address='Москва')
+        OrderItem.objects.create(order=order, product=self.product, quantity=3, price=100)
+        Order.objects.update(total_cost=0)
+
+        Order.objects.recalculate_total_cost()
+
+        order.refresh_from_db()
+        self.assertEqual(order.total_cost, 300)
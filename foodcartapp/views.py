@@ -1,73 +1,61 @@
 from django.db import transaction
 from django.http import JsonResponse
-from django.templatetags.static import static
 
+from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
-from .models import Product, Order, OrderItem
-
+from .banners import get_banners_max_age, get_banners_snapshot
+from .catalog import get_catalog_snapshot, get_restaurant_catalog_snapshot
+from .idempotency import idempotent
+from .intake import enqueue_order, is_intake_queue_enabled, is_intake_queue_full
+from .responses import packed_json_response
+from .search import search_available_products
 from .serializers import OrderSerializer
 
 
+SEARCH_RESULTS_LIMIT = 50
+
+
 def banners_list_api(request):
-    # FIXME move data to db?
-    return JsonResponse([
-        {
-            'title': 'Burger',
-            'src': static('burger.jpg'),
-            'text': 'Tasty Burger at your door step',
-        },
-        {
-            'title': 'Spices',
-            'src': static('food.jpg'),
-            'text': 'All Cuisines',
-        },
-        {
-            'title': 'New York',
-            'src': static('tasty.jpg'),
-            'text': 'Food is incomplete without a tasty dessert',
-        }
-    ], safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    snapshot = get_banners_snapshot()
+    return packed_json_response(request, snapshot, max_age=get_banners_max_age(snapshot))
 
 
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            } if product.category else None,
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
+    return packed_json_response(request, get_catalog_snapshot())
+
+
+def product_search_api(request):
+    query = request.GET.get('q', '')
+    try:
+        limit = max(0, min(int(request.GET.get('limit', SEARCH_RESULTS_LIMIT)), SEARCH_RESULTS_LIMIT))
+    except ValueError:
+        limit = SEARCH_RESULTS_LIMIT
+
+    return JsonResponse(search_available_products(query, limit), safe=False, json_dumps_params={
         'ensure_ascii': False,
-        'indent': 4,
     })
 
 
+def restaurant_product_list_api(request, restaurant_id):
+    return packed_json_response(request, get_restaurant_catalog_snapshot(restaurant_id))
+
+
 @api_view(['POST'])
 @transaction.atomic()
+@idempotent
 def register_order(request):
     serializer = OrderSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
+    if is_intake_queue_enabled() and not is_intake_queue_full():
+        intake = enqueue_order(serializer.validated_data)
+        return Response(
+            {'intake_id': intake.id, 'status': 'queued', **serializer.data},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
     serializer.save()
 
     return Response(serializer.data)
@@ -0,0 +1,69 @@
+import re
+
+
+TOKEN_PATTERN = re.compile(r'[\w/-]+')
+HOUSE_LETTER_PATTERN = re.compile(r'^(\d+)-?([а-я])$')
+# «к1», «корп2», «стр3» без пробела перед номером
+GLUED_NUMBER_PATTERN = re.compile(r'^(к|корп|стр)(\d+)$')
+
+# сокращения после удаления точек: «ул.» и «ул» дают один и тот же токен
+STREET_ABBREVIATIONS = {
+    'ул': 'улица',
+    'пр': 'проспект',
+    'пр-т': 'проспект',
+    'пр-кт': 'проспект',
+    'просп': 'проспект',
+    'пр-д': 'проезд',
+    'пер': 'переулок',
+    'пл': 'площадь',
+    'б-р': 'бульвар',
+    'бул': 'бульвар',
+    'бульв': 'бульвар',
+    'ш': 'шоссе',
+    'наб': 'набережная',
+    'туп': 'тупик',
+    'мкр': 'микрорайон',
+    'мкрн': 'микрорайон',
+    'р-н': 'район',
+    'обл': 'область',
+    'г': 'город',
+    'д': 'дом',
+    'к': 'корпус',
+    'корп': 'корпус',
+    'стр': 'строение',
+    'кв': 'квартира',
+}
+
+# слова, которые не меняют место на карте: «г. Москва, д. 5» и «Москва, 5» — один адрес
+NOISE_WORDS = {'город', 'дом'}
+
+
+def join_house_letters(tokens):
+    # «5 а», «5-а» и «5а» — один и тот же дом. Буква перед числом — это
+    # сокращение, как «к» в «5 к 1», и она остаётся отдельным словом
+    joined = []
+    for index, token in enumerate(tokens):
+        next_token = tokens[index + 1] if index + 1 < len(tokens) else ''
+        is_house_letter = len(token) == 1 and token.isalpha() and not next_token[:1].isdigit()
+        if is_house_letter and joined and joined[-1][-1:].isdigit():
+            joined[-1] += token
+            continue
+        joined.append(HOUSE_LETTER_PATTERN.sub(r'\1\2', token))
+    return joined
+
+
+def split_glued_numbers(tokens):
+    for token in tokens:
+        match = GLUED_NUMBER_PATTERN.match(token)
+        if match:
+            yield from match.groups()
+        else:
+            yield token
+
+
+def normalize_address(address):
+    text = (address or '').casefold().replace('ё', 'е')
+    tokens = [token.strip('-/') for token in TOKEN_PATTERN.findall(text)]
+    tokens = join_house_letters(list(split_glued_numbers(token for token in tokens if token)))
+    words = (STREET_ABBREVIATIONS.get(token, token) for token in tokens)
+    return ' '.join(word for word in words if word not in NOISE_WORDS)
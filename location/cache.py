@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.utils.timezone import now
+
+
+class GeocodeCache:
+    # первый уровень кэша координат — в памяти процесса, второй — таблица Location.
+    # Запись живёт в памяти не дольше ttl секунд и не дольше, чем сама запись
+    # Location считается свежей (max_age), после чего адрес снова идёт в геокодер
+    def __init__(self, max_size, ttl, max_age):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.counters = {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'expired': 0,
+        }
+
+    def get_fresh_since(self):
+        # записи Location, обновлённые раньше этого момента, не отдаются
+        return now() - self.max_age
+
+    def get_many(self, addresses):
+        found = {}
+        current_time = monotonic()
+        with self.lock:
+            for address in addresses:
+                entry = self.entries.get(address)
+                if not entry:
+                    continue
+                coordinates, expires_at = entry
+                if expires_at <= current_time:
+                    del self.entries[address]
+                    self.counters['expired'] += 1
+                    continue
+                self.entries.move_to_end(address)
+                found[address] = coordinates
+            self.counters['memory_hits'] += len(found)
+        return found
+
+    def set_many(self, locations):
+        # locations — {адрес: (широта, долгота, updated_at)}
+        current_time = monotonic()
+        current_datetime = now()
+        with self.lock:
+            for address, (latitude, longitude, updated_at) in locations.items():
+                remaining_age = (updated_at + self.max_age - current_datetime).total_seconds()
+                if remaining_age <= 0:
+                    continue
+                expires_at = current_time + min(self.ttl, remaining_age)
+                self.entries[address] = ((latitude, longitude), expires_at)
+                self.entries.move_to_end(address)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def count(self, db_hits=0, misses=0):
+        with self.lock:
+            self.counters['db_hits'] += db_hits
+            self.counters['misses'] += misses
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters, size=len(self.entries))
+        requests_count = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['db_hits']) / requests_count if requests_count else 0
+        return stats
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            for counter in self.counters:
+                self.counters[counter] = 0
+
+
+geocode_cache = GeocodeCache(
+    max_size=settings.GEOCODE_CACHE_SIZE,
+    ttl=settings.GEOCODE_CACHE_TTL,
+    max_age=timedelta(days=settings.LOCATION_MAX_AGE_DAYS),
+)
@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+from location.addresses import normalize_address
+
+
+def merge_duplicate_locations(apps, schema_editor):
+    # из адресов, которые после нормализации совпали, остаётся запись с координатами
+    # и самым свежим updated_at, остальные удаляются
+    Location = apps.get_model('location', 'Location')
+
+    groups = {}
+    locations = Location.objects.values_list('id', 'address', 'latitude', 'longitude', 'updated_at')
+    for location_id, address, latitude, longitude, updated_at in locations.iterator():
+        has_coordinates = latitude is not None and longitude is not None
+        groups.setdefault(normalize_address(address), []).append(
+            (has_coordinates, updated_at, location_id, address)
+        )
+
+    for key, group in groups.items():
+        group.sort(reverse=True)
+        _, _, survivor_id, survivor_address = group[0]
+        duplicate_ids = [location_id for _, _, location_id, _ in group[1:]]
+        if duplicate_ids:
+            Location.objects.filter(id__in=duplicate_ids).delete()
+        if survivor_address != key:
+            Location.objects.filter(id=survivor_id).update(address=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location', '0002_alter_location_latitude_alter_location_longitude'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='location',
+            name='address',
+            field=models.CharField(max_length=255, unique=True, verbose_name='Адрес'),
+        ),
+        migrations.RunPython(merge_duplicate_locations, migrations.RunPython.noop),
+    ]
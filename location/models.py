@@ -1,12 +1,15 @@
 from django.db import models
 
+from .addresses import normalize_address
+
 
 class Location(models.Model):
     updated_at = models.DateTimeField(
         verbose_name='Дата/время обновления',
     )
+    # нормализованный адрес, см. location.addresses.normalize_address
     address = models.CharField(
-        max_length=150,
+        max_length=255,
         unique=True,
         verbose_name='Адрес',
     )
@@ -28,5 +31,9 @@ class Location(models.Model):
             models.Index(fields=['updated_at'])
         ]
 
+    def save(self, *args, **kwargs):
+        self.address = normalize_address(self.address)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f'{self.address} - ({self.longitude},{self.latitude})'
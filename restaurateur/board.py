@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from django.db.models import Q
+
+from foodcartapp.models import Order, OrderItem, OrderRestaurantCandidate, Restaurant
+
+
+BOARD_PAGE_SIZE = 50
+UNASSIGNED_RESTAURANT = 'none'
+UNSELECTED_PAYMENT_TYPE = 'none'
+
+STATUS_LABELS = dict(Order.STATE_CHOICES)
+PAYMENT_TYPE_LABELS = dict(Order.PAYMENT_TYPE_CHOICES)
+
+
+def format_candidate(restaurant, distance):
+    if distance is None:
+        return restaurant.name
+    return f'{restaurant.name} - {round(distance, 2)} км.'
+
+
+def encode_cursor(order):
+    return f'{order.registered_at.isoformat()}|{order.id}'
+
+
+def decode_cursor(cursor):
+    try:
+        registered_at, order_id = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(registered_at), int(order_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def filter_open_orders(status='', payment_type='', restaurant=''):
+    orders = Order.objects.exclude(status=Order.DONE)
+    if status:
+        orders = orders.filter(status=status)
+    if payment_type == UNSELECTED_PAYMENT_TYPE:
+        orders = orders.filter(payment_type='')
+    elif payment_type:
+        orders = orders.filter(payment_type=payment_type)
+    if restaurant == UNASSIGNED_RESTAURANT:
+        orders = orders.filter(restaurant__isnull=True)
+    elif restaurant:
+        orders = orders.filter(restaurant_id=restaurant)
+    return orders
+
+
+def get_board_orders_page_query(after=None, **filters):
+    # заказы выбираются по ключу (registered_at, id) с частичным индексом открытых заказов
+    orders = filter_open_orders(**filters)
+    cursor = decode_cursor(after)
+    if cursor:
+        registered_at, order_id = cursor
+        orders = orders.filter(
+            Q(registered_at__gt=registered_at) | Q(registered_at=registered_at, id__gt=order_id)
+        )
+    return orders.order_by('registered_at', 'id')
+
+
+def select_board_orders(after=None, page_size=BOARD_PAGE_SIZE, **filters):
+    orders = list(get_board_orders_page_query(after=after, **filters)[:page_size + 1])
+    next_cursor = encode_cursor(orders[page_size - 1]) if len(orders) > page_size else None
+    return orders[:page_size], next_cursor
+
+
+def select_board_order(order_id, **filters):
+    # одна строка доски для живого обновления; None — если заказ под фильтры больше не подходит
+    return filter_open_orders(**filters).filter(pk=order_id).first()
+
+
+def annotate_board_orders(orders):
+    # стоимость зависит только от числа строк: товары, кандидаты и рестораны
+    # загружаются тремя запросами сразу для всех переданных заказов
+    orders_product_ids = {}
+    for order_id, product_id in OrderItem.objects.filter(order__in=orders).values_list('order_id', 'product_id'):
+        orders_product_ids.setdefault(order_id, []).append(product_id)
+
+    candidates = list(
+        OrderRestaurantCandidate.objects
+        .filter(order__in=[order for order in orders if not order.restaurant_id])
+        .values_list('order_id', 'restaurant_id', 'distance')
+    )
+    restaurant_ids = {order.restaurant_id for order in orders if order.restaurant_id}
+    restaurant_ids.update(restaurant_id for _, restaurant_id, _ in candidates)
+    restaurants = Restaurant.objects.in_bulk(restaurant_ids)
+
+    orders_candidates = {}
+    for order_id, restaurant_id, distance in candidates:
+        orders_candidates.setdefault(order_id, []).append(
+            format_candidate(restaurants[restaurant_id], distance)
+        )
+
+    for order in orders:
+        order.product_ids = orders_product_ids.get(order.id, [])
+        order.status = STATUS_LABELS[order.status]
+        order.payment_type = PAYMENT_TYPE_LABELS.get(order.payment_type, 'Не выбрано')
+
+        if order.restaurant_id:
+            order.restaurants = [restaurants[order.restaurant_id], ]
+        else:
+            order.restaurants = orders_candidates.get(order.id, [])
+
+    return orders
@@ -0,0 +1,30 @@
+import numpy as np
+
+
+# средний радиус Земли по IUGG. Гаверсинус считает расстояние по сфере,
+# поэтому расходится с геодезическим расстоянием на эллипсоиде WGS84
+# (geopy.distance.distance) не больше чем на 0,6%, на широте Москвы —
+# не больше 0,35%. В пределах города это сотня метров, для выбора
+# ближайшего ресторана такой точности хватает.
+#
+# Кандидатов для заказов ищет k-d дерево из spatial.py, его расстояния
+# считаются по той же сфере с тем же радиусом. Матрица остаётся эталоном
+# для дерева в тестах и для замера benchmark_distances.
+EARTH_RADIUS_KM = 6371.0088
+
+
+def compute_distance_matrix(start_coordinates, end_coordinates):
+    start = np.radians(np.asarray(start_coordinates, dtype=float).reshape(-1, 2))
+    end = np.radians(np.asarray(end_coordinates, dtype=float).reshape(-1, 2))
+
+    start_latitudes = start[:, 0, np.newaxis]
+    start_longitudes = start[:, 1, np.newaxis]
+    end_latitudes = end[np.newaxis, :, 0]
+    end_longitudes = end[np.newaxis, :, 1]
+
+    haversine = (
+        np.sin((end_latitudes - start_latitudes) / 2) ** 2
+        + np.cos(start_latitudes) * np.cos(end_latitudes)
+        * np.sin((end_longitudes - start_longitudes) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(haversine, 0, 1)))
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from foodcartapp.models import OrderEvent
+
+
+# транзакции коммитятся не в порядке выдачи id: событие с меньшим id может
+# появиться уже после того, как клиент получил большее. Поэтому ответ
+# захватывает недавние события чуть раньше курсора, повторы отсеивает браузер
+EVENTS_OVERLAP = 100
+LATE_COMMIT_WINDOW = timedelta(seconds=10)
+POLL_INTERVAL = 0.5
+
+
+def purge_old_events():
+    expired_at = timezone.now() - timedelta(seconds=settings.ORDER_EVENTS_TTL)
+    deleted, _ = OrderEvent.objects.filter(created_at__lt=expired_at).delete()
+    return deleted
+
+
+def get_last_event_id():
+    return OrderEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def load_order_events(after):
+    events = OrderEvent.objects.filter(
+        Q(id__gt=after)
+        | Q(id__gt=after - EVENTS_OVERLAP, created_at__gte=timezone.now() - LATE_COMMIT_WINDOW)
+    )
+    return list(events.order_by('id').values('id', 'order_id', 'kind'))
+
+
+def wait_for_order_events(after, timeout):
+    # короткий long-poll: ответ держится не дольше timeout секунд, чтобы
+    # открытая доска не занимала синхронный воркер gunicorn надолго
+    deadline = time.monotonic() + timeout
+    while True:
+        events = load_order_events(after)
+        if any(event['id'] > after for event in events) or time.monotonic() >= deadline:
+            return events
+        time.sleep(POLL_INTERVAL)
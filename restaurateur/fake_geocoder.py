@@ -0,0 +1,72 @@
+import hashlib
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+
+def get_fake_coordinates(address):
+    # детерминированная точка в пределах Москвы, чтобы расстояния были правдоподобными
+    digest = hashlib.sha256(address.encode('utf-8')).digest()
+    latitude = 55.55 + digest[0] / 255 * 0.4
+    longitude = 37.35 + digest[1] / 255 * 0.5
+    return latitude, longitude
+
+
+class FakeGeocoderHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        address = parse_qs(urlparse(self.path).query).get('geocode', [''])[0]
+        # обработчики работают в потоках сервера, += без блокировки теряет запросы
+        with self.server.requests_count_lock:
+            self.server.requests_count += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        feature_members = []
+        if address and address not in self.server.unknown_addresses:
+            latitude, longitude = get_fake_coordinates(address)
+            feature_members.append({
+                'GeoObject': {'Point': {'pos': f'{longitude} {latitude}'}},
+            })
+        body = json.dumps({
+            'response': {'GeoObjectCollection': {'featureMember': feature_members}},
+        }).encode('utf-8')
+
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # клиент не дождался ответа по таймауту, так и задумано в тестах
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGeocoderServer(ThreadingHTTPServer):
+    # подменяет геокодер Яндекса в тестах и замерах, отвечает в том же формате
+    daemon_threads = True
+
+    def __init__(self, delay=0, unknown_addresses=()):
+        super().__init__(('127.0.0.1', 0), FakeGeocoderHandler)
+        self.delay = delay
+        self.unknown_addresses = set(unknown_addresses)
+        self.requests_count = 0
+        self.requests_count_lock = Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'http://{host}:{port}/1.x'
+
+    def __enter__(self):
+        Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
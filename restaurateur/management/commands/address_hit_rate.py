@@ -0,0 +1,48 @@
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import ArchivedOrder, Order, Restaurant
+from location.addresses import normalize_address
+
+
+class Command(BaseCommand):
+    help = 'Показывает, сколько запросов к геокодеру экономит нормализация адресов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            help='Файл с адресами, по одному на строку. По умолчанию берутся адреса последних заказов',
+        )
+        parser.add_argument('--limit', type=int, default=5000)
+
+    def get_addresses(self, options):
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as addresses_file:
+                return [line.rstrip('\n') for line in addresses_file if line.strip()][:options['limit']]
+
+        limit = options['limit']
+        return list(chain(
+            Order.objects.order_by('-registered_at').values_list('address', flat=True)[:limit],
+            ArchivedOrder.objects.order_by('-registered_at').values_list('address', flat=True)[:limit],
+            Restaurant.objects.values_list('address', flat=True),
+        ))[:limit]
+
+    def handle(self, *args, **options):
+        addresses = [address for address in self.get_addresses(options) if address]
+        if not addresses:
+            self.stdout.write('Адресов для проверки нет')
+            return
+
+        # в холодном кэше каждый уникальный ключ — один запрос к геокодеру, остальное — попадания
+        raw_keys_count = len(set(addresses))
+        normalized_keys_count = len({normalize_address(address) for address in addresses})
+        raw_hit_rate = 1 - raw_keys_count / len(addresses)
+        normalized_hit_rate = 1 - normalized_keys_count / len(addresses)
+
+        self.stdout.write(f'Адресов в выборке: {len(addresses)}')
+        self.stdout.write(f'Без нормализации: уникальных {raw_keys_count}, доля попаданий {raw_hit_rate:.1%}')
+        self.stdout.write(
+            f'С нормализацией: уникальных {normalized_keys_count}, доля попаданий {normalized_hit_rate:.1%}'
+        )
+        self.stdout.write(f'Запросов к геокодеру меньше на {raw_keys_count - normalized_keys_count}')
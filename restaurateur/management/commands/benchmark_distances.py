@@ -0,0 +1,55 @@
+import random
+from time import perf_counter
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from geopy import distance
+
+from restaurateur.distances import compute_distance_matrix
+
+
+def generate_coordinates(count):
+    return [
+        (random.uniform(55.55, 55.95), random.uniform(37.35, 37.85))
+        for _ in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает матрицу расстояний на NumPy с попарным geopy.distance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--restaurants', type=int, default=200)
+        parser.add_argument(
+            '--geopy-orders',
+            type=int,
+            default=50,
+            help='Сколько заказов считать через geopy. Время для всех заказов экстраполируется',
+        )
+
+    def handle(self, *args, **options):
+        orders = generate_coordinates(options['orders'])
+        restaurants = generate_coordinates(options['restaurants'])
+        geopy_orders = orders[:options['geopy_orders']]
+
+        started_at = perf_counter()
+        matrix = compute_distance_matrix(orders, restaurants)
+        matrix_time = perf_counter() - started_at
+
+        started_at = perf_counter()
+        geodesic = np.array([
+            [distance.distance(order, restaurant).km for restaurant in restaurants]
+            for order in geopy_orders
+        ])
+        geopy_time = (perf_counter() - started_at) * len(orders) / len(geopy_orders)
+
+        relative_error = np.abs(matrix[:len(geopy_orders)] - geodesic) / np.maximum(geodesic, 1e-9)
+        self.stdout.write(f'Заказов: {len(orders)}, ресторанов: {len(restaurants)}')
+        self.stdout.write(f'NumPy, гаверсинус: {matrix_time * 1000:.1f} мс')
+        self.stdout.write(f'geopy, попарно (оценка по {len(geopy_orders)} заказам): {geopy_time * 1000:.0f} мс')
+        self.stdout.write(f'Ускорение: {geopy_time / matrix_time:.0f}×')
+        self.stdout.write(
+            f'Погрешность относительно geopy: макс. {relative_error.max() * 100:.3f}%, '
+            f'{np.abs(matrix[:len(geopy_orders)] - geodesic).max() * 1000:.0f} м'
+        )
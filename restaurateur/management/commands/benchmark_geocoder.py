@@ -0,0 +1,61 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from location.cache import geocode_cache
+from restaurateur.fake_geocoder import FakeGeocoderServer
+from restaurateur.services import fetch_coordinates, fetch_coordinates_batch
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает последовательное и пакетное геокодирование на фейковом геокодере'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--addresses', type=int, default=100)
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=0.05,
+            help='Задержка ответа фейкового геокодера в секундах',
+        )
+
+    def handle(self, *args, **options):
+        addresses = [f'Москва, улица Замерная, {number}' for number in range(options['addresses'])]
+
+        with FakeGeocoderServer(delay=options['delay']) as server, override_settings(YANDEX_GEOCODER_URL=server.url):
+            with transaction.atomic():
+                geocode_cache.clear()
+                started_at = perf_counter()
+                for address in addresses:
+                    fetch_coordinates(settings.YANDEX_GEO_API_KEY, address)
+                serial_time = perf_counter() - started_at
+                transaction.set_rollback(True)
+
+            with transaction.atomic():
+                geocode_cache.clear()
+                started_at = perf_counter()
+                fetch_coordinates_batch(settings.YANDEX_GEO_API_KEY, addresses + addresses)
+                batch_time = perf_counter() - started_at
+                transaction.set_rollback(True)
+
+            # повторный проход целиком попадает в кэш в памяти процесса
+            started_at = perf_counter()
+            for address in addresses:
+                fetch_coordinates(settings.YANDEX_GEO_API_KEY, address)
+            cached_time = perf_counter() - started_at
+            cache_stats = geocode_cache.stats()
+            geocode_cache.clear()
+
+        self.stdout.write(f'Адресов: {len(addresses)}, задержка геокодера: {options["delay"] * 1000:.0f} мс')
+        self.stdout.write(f'По одному: {serial_time:.2f} с')
+        self.stdout.write(
+            f'Пакетом ({settings.GEOCODER_MAX_WORKERS} потоков, каждый адрес дважды): {batch_time:.2f} с'
+        )
+        self.stdout.write(f'Повторно по одному, из кэша в памяти: {cached_time:.4f} с')
+        self.stdout.write(
+            f'Кэш: в памяти {cache_stats["memory_hits"]}, в базе {cache_stats["db_hits"]}, '
+            f'промахов {cache_stats["misses"]}, доля попаданий {cache_stats["hit_rate"]:.0%}'
+        )
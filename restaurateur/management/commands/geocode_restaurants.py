@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from foodcartapp.models import Restaurant
+from restaurateur.services import geocode_restaurants
+
+
+class Command(BaseCommand):
+    help = 'Заполняет координаты ресторанов по их адресам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Геокодировать все рестораны, а не только те, у которых нет координат',
+        )
+
+    def handle(self, *args, **options):
+        restaurants = Restaurant.objects.all()
+        if not options['all']:
+            restaurants = restaurants.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True))
+
+        restaurants = list(restaurants)
+        previous_coordinates = {restaurant.pk: restaurant.coordinates for restaurant in restaurants}
+
+        # save() вызывает сигналы: в одной транзакции каталог пересоберётся один раз, после коммита
+        with transaction.atomic():
+            for restaurant in geocode_restaurants(restaurants):
+                if restaurant.coordinates != previous_coordinates[restaurant.pk]:
+                    restaurant.save(update_fields=['latitude', 'longitude'])
+                self.stdout.write(f'{restaurant.name}: {restaurant.coordinates}')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from restaurateur.events import purge_old_events
+
+
+class Command(BaseCommand):
+    help = 'Удаляет события заказов старше ORDER_EVENTS_TTL'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Удалено событий: {purge_old_events()}')
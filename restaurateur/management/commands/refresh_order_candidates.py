@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order
+from location.cache import geocode_cache
+from restaurateur.services import refresh_stale_order_candidates
+
+
+class Command(BaseCommand):
+    help = 'Подбирает рестораны для заказов, у которых поменялось меню ресторанов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать кандидатов для всех необработанных заказов',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять устаревшие заказы каждые --interval секунд',
+        )
+        parser.add_argument('--interval', type=float, default=10)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            Order.objects.awaiting_restaurant().update(candidates_updated_at=None)
+
+        while True:
+            refreshed = refresh_stale_order_candidates(options['batch_size'])
+            if refreshed:
+                cache_stats = geocode_cache.stats()
+                self.stdout.write(
+                    f'Обновлено заказов: {refreshed}, кэш координат: '
+                    f'в памяти {cache_stats["memory_hits"]}, в базе {cache_stats["db_hits"]}, '
+                    f'промахов {cache_stats["misses"]}'
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_order_rows_cache_table(apps, schema_editor):
+    # отдельная таблица для кэша строк доски (settings.CACHES['order_rows'])
+    call_command('createcachetable', 'django_cache_order_rows', database=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0070_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_order_rows_cache_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+from time import time_ns
+
+from django.core.cache import caches
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from foodcartapp.catalog import get_catalog_version
+from restaurateur.board import annotate_board_orders
+
+
+ORDER_ROW_TIMEOUT = 24 * 60 * 60
+ORDER_ROWS_CACHE = 'order_rows'
+
+
+def get_order_row_version_key(order_id):
+    return f'order-row:{order_id}:version'
+
+
+def bump_order_row_versions(order_ids):
+    # новая версия — просто новое уникальное число, старые фрагменты
+    # никто больше не запросит, и они вытеснятся из кэша сами
+    version = time_ns()
+    caches[ORDER_ROWS_CACHE].set_many(
+        {get_order_row_version_key(order_id): version for order_id in order_ids},
+        timeout=ORDER_ROW_TIMEOUT,
+    )
+
+
+def schedule_order_rows_bump(order_ids):
+    # до коммита другой запрос прочитал бы старые данные и закэшировал их под новой версией
+    order_ids = set(order_ids)
+    transaction.on_commit(lambda: bump_order_row_versions(order_ids))
+
+
+def get_order_row_versions(order_ids):
+    version_keys = {get_order_row_version_key(order_id): order_id for order_id in order_ids}
+    versions = {
+        version_keys[key]: version
+        for key, version in caches[ORDER_ROWS_CACHE].get_many(version_keys).items()
+    }
+    missing_order_ids = [order_id for order_id in order_ids if order_id not in versions]
+    if missing_order_ids:
+        version = time_ns()
+        caches[ORDER_ROWS_CACHE].set_many(
+            {get_order_row_version_key(order_id): version for order_id in missing_order_ids},
+            timeout=ORDER_ROW_TIMEOUT,
+        )
+        versions.update((order_id, version) for order_id in missing_order_ids)
+    return versions
+
+
+def render_order_rows(orders):
+    # в кэше лежат ячейки строки без ссылки на админку: ссылка зависит от страницы доски.
+    # Товары, кандидаты и рестораны загружаются только для строк, которых нет в кэше
+    catalog_version = get_catalog_version()
+    versions = get_order_row_versions([order.id for order in orders])
+    row_keys = {
+        order.id: f'order-row:{order.id}:{versions[order.id]}:{catalog_version}'
+        for order in orders
+    }
+    cached_rows = caches[ORDER_ROWS_CACHE].get_many(row_keys.values())
+
+    stale_orders = [order for order in orders if row_keys[order.id] not in cached_rows]
+    rendered_rows = {}
+    for order in annotate_board_orders(stale_orders):
+        html = render_to_string('order_row_cells.html', {'item': order})
+        rendered_rows[row_keys[order.id]] = html
+    caches[ORDER_ROWS_CACHE].set_many(rendered_rows, timeout=ORDER_ROW_TIMEOUT)
+    cached_rows.update(rendered_rows)
+
+    for order in orders:
+        order.row_html = cached_rows[row_keys[order.id]]
+    return orders
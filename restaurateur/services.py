@@ -1,40 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
 from django.utils.timezone import now
-from geopy import distance
 import requests
 
+from foodcartapp.availability import get_availability_bitmap
+from foodcartapp.catalog import get_catalog_version
+from foodcartapp.models import Order, OrderEvent, OrderItem, OrderRestaurantCandidate, Restaurant
+from location.addresses import normalize_address
+from location.cache import geocode_cache
 from location.models import Location
+from restaurateur.row_cache import schedule_order_rows_bump
+from restaurateur.spatial import get_restaurant_spatial_index
+
+
+def request_coordinates(apikey, address):
+    response = requests.get(settings.YANDEX_GEOCODER_URL, params={
+        "geocode": address,
+        "apikey": apikey,
+        "format": "json",
+    }, timeout=settings.GEOCODER_TIMEOUT)
+    response.raise_for_status()
+
+    try:
+        found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+    except (AttributeError, KeyError):
+        return None
+    if not found_places:
+        return None
+
+    most_relevant = found_places[0]
+    longitude, latitude = most_relevant['GeoObject']['Point']['pos'].split(" ")
+    return float(latitude), float(longitude)
 
 
 def fetch_coordinates(apikey, address):
+    return fetch_coordinates_batch(apikey, [address]).get(address)
+
+
+def request_coordinates_safely(apikey, address):
     try:
-        location = Location.objects.get(address=address)
-        return location.longitude, location.latitude
-    except Location.DoesNotExist:
-        base_url = "https://geocode-maps.yandex.ru/1.x"
-        response = requests.get(base_url, params={
-            "geocode": address,
-            "apikey": apikey,
-            "format": "json",
-        })
-        response.raise_for_status()
-
-        try:
-            found_places = response.json()['response']['GeoObjectCollection']['featureMember']
-        except (AttributeError, KeyError):
-            return None
-
-        most_relevant = found_places[0]
-        longitude, latitude = most_relevant['GeoObject']['Point']['pos'].split(" ")
-
-        Location.objects.create(
-            updated_at=now(),
-            address=address,
-            longitude=longitude,
-            latitude=latitude,
+        return request_coordinates(apikey, address)
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def fetch_coordinates_batch(apikey, addresses):
+    # кэш и Location хранят нормализованный адрес, а геокодер получает адрес
+    # в том виде, как его ввели: так он точнее находит дом
+    address_keys = {address: normalize_address(address) for address in addresses if address}
+    key_addresses = {key: address for address, key in address_keys.items() if key}
+    keys = set(key_addresses)
+    coordinates = geocode_cache.get_many(keys)
+
+    fresh_since = geocode_cache.get_fresh_since()
+    fresh_locations = {}
+    stale_coordinates = {}
+    for location in Location.objects.filter(address__in=keys - coordinates.keys()):
+        if location.latitude is None or location.longitude is None:
+            continue
+        if location.updated_at < fresh_since:
+            stale_coordinates[location.address] = (location.latitude, location.longitude)
+            continue
+        coordinates[location.address] = (location.latitude, location.longitude)
+        fresh_locations[location.address] = (location.latitude, location.longitude, location.updated_at)
+    geocode_cache.set_many(fresh_locations)
+
+    missing_keys = sorted(keys - coordinates.keys())
+    geocode_cache.count(db_hits=len(fresh_locations), misses=len(missing_keys))
+    if missing_keys:
+        max_workers = min(settings.GEOCODER_MAX_WORKERS, len(missing_keys))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            found_coordinates = executor.map(
+                lambda key: request_coordinates_safely(apikey, key_addresses[key]),
+                missing_keys,
+            )
+            found_coordinates = dict(zip(missing_keys, found_coordinates))
+
+        refreshed_at = now()
+        refreshed_locations = {}
+        for key, key_coordinates in found_coordinates.items():
+            if not key_coordinates:
+                # если геокодер не ответил, устаревшие координаты лучше, чем никаких;
+                # updated_at не трогаем, и в следующий раз адрес снова уйдёт в геокодер
+                if key in stale_coordinates:
+                    coordinates[key] = stale_coordinates[key]
+                continue
+            coordinates[key] = key_coordinates
+            latitude, longitude = key_coordinates
+            refreshed_locations[key] = (latitude, longitude, refreshed_at)
+
+        Location.objects.bulk_create(
+            [
+                Location(updated_at=updated_at, address=key, latitude=latitude, longitude=longitude)
+                for key, (latitude, longitude, updated_at) in refreshed_locations.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['address'],
+            update_fields=['updated_at', 'latitude', 'longitude'],
+        )
+        geocode_cache.set_many(refreshed_locations)
+
+    return {
+        address: coordinates[key]
+        for address, key in address_keys.items()
+        if key in coordinates
+    }
+
+
+def geocode_restaurants(restaurants):
+    restaurants = [restaurant for restaurant in restaurants if restaurant.address]
+    coordinates = fetch_coordinates_batch(
+        settings.YANDEX_GEO_API_KEY,
+        {restaurant.address for restaurant in restaurants},
+    )
+    for restaurant in restaurants:
+        # геокодер не ответил или не нашёл адрес: прежние координаты лучше, чем никаких
+        if restaurant.address in coordinates:
+            restaurant.latitude, restaurant.longitude = coordinates[restaurant.address]
+    return restaurants
+
+
+def refresh_order_candidates(orders):
+    orders = list(orders)
+    if not orders:
+        return
+
+    version = get_catalog_version()
+    bitmap = get_availability_bitmap(version)
+    spatial_index = get_restaurant_spatial_index(version)
+    restaurants = Restaurant.objects.in_bulk()
+
+    orders_products = {}
+    for order_id, product_id in OrderItem.objects.filter(order__in=orders).values_list('order_id', 'product_id'):
+        orders_products.setdefault(order_id, set()).add(product_id)
+
+    coordinates = fetch_coordinates_batch(
+        settings.YANDEX_GEO_API_KEY,
+        {order.address for order in orders},
+    )
+
+    candidates = []
+    for order in orders:
+        capable_mask = bitmap.mask_for_products(orders_products.get(order.id, ()))
+        if order.address in coordinates:
+            nearest_restaurants = spatial_index.nearest(
+                coordinates[order.address],
+                k=settings.ORDER_CANDIDATES_LIMIT,
+                radius_km=settings.ORDER_CANDIDATES_RADIUS_KM,
+                accept=lambda restaurant_id: capable_mask & bitmap.restaurant_bits.get(restaurant_id, 0),
+            )
+        else:
+            nearest_restaurants = [
+                (restaurant_id, None)
+                for restaurant_id in bitmap.decode(capable_mask)[:settings.ORDER_CANDIDATES_LIMIT]
+            ]
+
+        candidates.extend(
+            OrderRestaurantCandidate(order=order, restaurant=restaurants[restaurant_id], distance=distance)
+            for restaurant_id, distance in nearest_restaurants
+            if restaurant_id in restaurants
         )
 
-        return latitude, longitude
+    with transaction.atomic():
+        OrderRestaurantCandidate.objects.filter(order__in=orders).delete()
+        OrderRestaurantCandidate.objects.bulk_create(candidates)
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(candidates_updated_at=now())
+        OrderEvent.objects.publish([order.pk for order in orders], OrderEvent.UPDATED)
+        schedule_order_rows_bump(order.pk for order in orders)
 
 
-def compute_distance(start_coords, end_coords):
-    return distance.distance(start_coords, end_coords).km
+def refresh_stale_order_candidates(batch_size):
+    orders = (
+        Order.objects
+        .awaiting_restaurant()
+        .filter(candidates_updated_at__isnull=True)
+        .order_by('registered_at')[:batch_size]
+    )
+    orders = list(orders)
+    refresh_order_candidates(orders)
+    return len(orders)
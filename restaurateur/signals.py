@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from foodcartapp.models import Order, OrderItem, Restaurant
+from foodcartapp.signals import restaurant_address_changed
+
+from .row_cache import schedule_order_rows_bump
+from .services import geocode_restaurants
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def invalidate_order_row(sender, instance, **kwargs):
+    order_id = instance.pk if sender is Order else instance.order_id
+    schedule_order_rows_bump([order_id])
+
+
+def save_restaurant_coordinates(restaurant):
+    previous_coordinates = restaurant.coordinates
+    geocode_restaurants([restaurant])
+    if restaurant.coordinates != previous_coordinates:
+        restaurant.save(update_fields=['latitude', 'longitude'])
+
+
+@receiver(restaurant_address_changed, sender=Restaurant)
+def geocode_restaurant(sender, instance, **kwargs):
+    # геокодер отвечает до GEOCODER_TIMEOUT секунд, транзакцию админки ради него не держим
+    transaction.on_commit(lambda: save_restaurant_coordinates(instance))
@@ -0,0 +1,119 @@
+import heapq
+import math
+from threading import Lock
+
+import numpy as np
+
+from foodcartapp.models import Restaurant
+from restaurateur.distances import EARTH_RADIUS_KM
+
+
+def to_unit_vectors(coordinates):
+    radians = np.radians(np.asarray(coordinates, dtype=float).reshape(-1, 2))
+    latitudes, longitudes = radians[:, 0], radians[:, 1]
+    return np.column_stack([
+        np.cos(latitudes) * np.cos(longitudes),
+        np.cos(latitudes) * np.sin(longitudes),
+        np.sin(latitudes),
+    ]).tolist()
+
+
+def km_to_chord(distance_km):
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1))
+
+
+class KDNode:
+    __slots__ = ['point', 'restaurant_id', 'axis', 'left', 'right']
+
+    def __init__(self, point, restaurant_id, axis, left, right):
+        self.point = point
+        self.restaurant_id = restaurant_id
+        self.axis = axis
+        self.left = left
+        self.right = right
+
+
+def build_kd_tree(points, depth=0):
+    if not points:
+        return None
+    axis = depth % 3
+    points.sort(key=lambda point: point[0][axis])
+    median = len(points) // 2
+    point, restaurant_id = points[median]
+    return KDNode(
+        point,
+        restaurant_id,
+        axis,
+        build_kd_tree(points[:median], depth + 1),
+        build_kd_tree(points[median + 1:], depth + 1),
+    )
+
+
+class RestaurantSpatialIndex:
+    # k-d дерево по точкам ресторанов на единичной сфере: длина хорды монотонна
+    # по расстоянию вдоль поверхности, поэтому ближайшие по хорде — ближайшие
+    # и по гаверсинусу, а поиск не зависит от проекции и широты
+
+    def __init__(self, version, restaurants):
+        self.version = version
+        restaurants = [
+            (restaurant_id, (latitude, longitude))
+            for restaurant_id, latitude, longitude in restaurants
+            if latitude is not None and longitude is not None
+        ]
+        points = to_unit_vectors([coordinates for _, coordinates in restaurants])
+        self.size = len(restaurants)
+        self.root = build_kd_tree([
+            (tuple(point), restaurant_id)
+            for point, (restaurant_id, _) in zip(points, restaurants)
+        ])
+
+    def nearest(self, coordinates, k, radius_km=None, accept=None):
+        if k <= 0 or not self.root:
+            return []
+        target = to_unit_vectors([coordinates])[0]
+        max_squared_chord = km_to_chord(radius_km) ** 2 if radius_km is not None else math.inf
+        found = []
+
+        def get_bound():
+            if len(found) < k:
+                return max_squared_chord
+            return -found[0][0]
+
+        def visit(node):
+            if node is None:
+                return
+            squared_chord = sum((a - b) ** 2 for a, b in zip(node.point, target))
+            if squared_chord <= get_bound() and (accept is None or accept(node.restaurant_id)):
+                heapq.heappush(found, (-squared_chord, node.restaurant_id))
+                if len(found) > k:
+                    heapq.heappop(found)
+
+            difference = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if difference < 0 else (node.right, node.left)
+            visit(near)
+            if difference ** 2 <= get_bound():
+                visit(far)
+
+        visit(self.root)
+        return [
+            (restaurant_id, chord_to_km(math.sqrt(-negative_squared_chord)))
+            for negative_squared_chord, restaurant_id in sorted(found, reverse=True)
+        ]
+
+
+_index = None
+_index_lock = Lock()
+
+
+def get_restaurant_spatial_index(version):
+    global _index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            restaurants = Restaurant.objects.values_list('id', 'latitude', 'longitude')
+            _index = RestaurantSpatialIndex(version, restaurants)
+        return _index
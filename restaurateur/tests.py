@@ -1,3 +1,562 @@
-from django.test import TestCase
+import re
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from geopy import distance
+
+from foodcartapp.catalog import CATALOG_VERSION_KEY, get_catalog_version
+from foodcartapp.models import Order, OrderEvent, OrderItem, OrderRestaurantCandidate, Product, Restaurant
+from foodcartapp.signals import restaurant_address_changed
+from location.addresses import normalize_address
+from location.cache import GeocodeCache, geocode_cache
+from location.models import Location
+from restaurateur.board import (
+    BOARD_PAGE_SIZE,
+    UNASSIGNED_RESTAURANT,
+    UNSELECTED_PAYMENT_TYPE,
+    annotate_board_orders,
+    encode_cursor,
+    get_board_orders_page_query,
+    select_board_order,
+    select_board_orders,
+)
+from restaurateur.distances import compute_distance_matrix
+from restaurateur.events import get_last_event_id, wait_for_order_events
+from restaurateur.fake_geocoder import FakeGeocoderServer, get_fake_coordinates
+from restaurateur.row_cache import render_order_rows
+from restaurateur.services import fetch_coordinates_batch
+from restaurateur.spatial import RestaurantSpatialIndex
+
+
+# кэш в памяти, чтобы в подсчёт запросов к базе не попадали обращения к кэшу
+LOCMEM_CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': alias,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+    for alias in ('default', 'order_rows')
+}
+# как в бою: таблицы кэша в базе, но кэш строк доски переполняется уже на первой странице
+DATABASE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'order_rows': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache_order_rows',
+        'OPTIONS': {'MAX_ENTRIES': 50},
+    },
+}
+
+
+def clear_caches():
+    for cache_alias in settings.CACHES:
+        caches[cache_alias].clear()
+
+
+class OrderBoardQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurants = Restaurant.objects.bulk_create(
+            Restaurant(name=f'Ресторан {number}', address=f'Адрес {number}') for number in range(5)
+        )
+        cls.products = Product.objects.bulk_create(
+            Product(name=f'Товар {number}', price=100, image='') for number in range(5)
+        )
+
+    def create_orders(self, count):
+        orders = Order.objects.bulk_create(
+            Order(
+                firstname='Иван',
+                lastname='Иванов',
+                phonenumber='+79291000000',
+                address='Москва',
+                restaurant=self.restaurants[0] if number % 3 == 0 else None,
+            )
+            for number in range(count)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=1, price=100)
+            for order in orders
+            for product in self.products[:2]
+        )
+        OrderRestaurantCandidate.objects.bulk_create(
+            OrderRestaurantCandidate(order=order, restaurant=restaurant, distance=1.5)
+            for order in orders
+            if not order.restaurant
+            for restaurant in self.restaurants[1:]
+        )
+
+    def count_rows_queries(self, warm_cache):
+        if not warm_cache:
+            clear_caches()
+        orders, _ = select_board_orders(page_size=5000)
+        with CaptureQueriesContext(connection) as queries:
+            rows = render_order_rows(orders)
+        return len(queries), rows
+
+    def count_view_queries(self, warm_cache):
+        if not warm_cache:
+            clear_caches()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('restaurateur:view_orders'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_rows_query_count_does_not_depend_on_orders_count(self):
+        self.create_orders(10)
+        small_cold_queries, rows = self.count_rows_queries(warm_cache=False)
+        small_warm_queries, rows = self.count_rows_queries(warm_cache=True)
+        self.assertEqual(len(rows), 10)
+
+        self.create_orders(4990)
+        large_cold_queries, rows = self.count_rows_queries(warm_cache=False)
+        large_warm_queries, rows = self.count_rows_queries(warm_cache=True)
+        self.assertEqual(len(rows), 5000)
+
+        self.assertEqual(small_cold_queries, large_cold_queries)
+        self.assertEqual(small_warm_queries, large_warm_queries)
+        self.assertLess(large_warm_queries, large_cold_queries)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_view_query_count_does_not_depend_on_orders_count(self):
+        manager = User.objects.create_user('manager', is_staff=True)
+        self.client.force_login(manager)
+
+        self.create_orders(10)
+        small_cold_queries = self.count_view_queries(warm_cache=False)
+        small_warm_queries = self.count_view_queries(warm_cache=True)
+
+        self.create_orders(BOARD_PAGE_SIZE * 2)
+        large_cold_queries = self.count_view_queries(warm_cache=False)
+        large_warm_queries = self.count_view_queries(warm_cache=True)
+
+        self.assertEqual(small_cold_queries, large_cold_queries)
+        self.assertEqual(small_warm_queries, large_warm_queries)
+        self.assertLess(large_warm_queries, large_cold_queries)
+
+    @override_settings(CACHES=DATABASE_CACHES)
+    def test_board_rows_do_not_evict_catalog(self):
+        self.create_orders(200)
+        catalog_version = get_catalog_version()
+
+        for _ in range(2):
+            orders, _ = select_board_orders(page_size=200)
+            rows = render_order_rows(orders)
+
+        self.assertEqual(cache.get(CATALOG_VERSION_KEY), catalog_version)
+        self.assertEqual(len(rows), 200)
+        self.assertTrue(all(f'<td>{row.id}</td>' in row.row_html for row in rows))
+
+    def test_keyset_pagination(self):
+        self.create_orders(BOARD_PAGE_SIZE * 2 + 1)
+
+        seen_order_ids = []
+        cursor = None
+        while True:
+            orders, cursor = select_board_orders(after=cursor)
+            seen_order_ids.extend(order.id for order in orders)
+            if not cursor:
+                break
+
+        expected_order_ids = list(Order.objects.order_by('registered_at', 'id').values_list('id', flat=True))
+        self.assertEqual(seen_order_ids, expected_order_ids)
+
+    def test_filters(self):
+        self.create_orders(9)
+        orders, _ = select_board_orders(restaurant=UNASSIGNED_RESTAURANT)
+        self.assertEqual(len(orders), 6)
+        orders, _ = select_board_orders(restaurant=str(self.restaurants[0].id))
+        self.assertEqual(len(orders), 3)
+        orders, _ = select_board_orders(status=Order.PREPARE)
+        self.assertEqual(orders, [])
+
+    def test_board_rows(self):
+        self.create_orders(3)
+        orders, _ = select_board_orders()
+        orders = annotate_board_orders(orders)
+        assigned_order, = [order for order in orders if order.restaurant_id]
+        unassigned_orders = [order for order in orders if not order.restaurant_id]
+
+        self.assertEqual(assigned_order.restaurants, [self.restaurants[0]])
+        self.assertEqual(len(unassigned_orders), 2)
+        for order in orders:
+            self.assertCountEqual(order.product_ids, [product.id for product in self.products[:2]])
+        for order in unassigned_orders:
+            self.assertEqual(len(order.restaurants), 4)
+            self.assertEqual(order.status, 'Создан')
+            self.assertEqual(order.payment_type, 'Не выбрано')
+
+
+class OrderEventsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+        cls.product = Product.objects.create(name='Товар', price=100, image='')
+
+    def register_order(self):
+        order = Order(firstname='Иван', lastname='Иванов', phonenumber='+79291000000', address='Москва')
+        item = OrderItem(product=self.product, quantity=2, price=100)
+        Order.objects.bulk_register([(order, [item])])
+        return order
+
+    def test_order_changes_publish_events(self):
+        order = self.register_order()
+        order.comment = 'Позвонить заранее'
+        order.save()
+        order.restaurant = self.restaurant
+        order.save()
+
+        events = list(OrderEvent.objects.filter(order_id=order.id).order_by('id').values_list('kind', flat=True))
+        self.assertEqual(events, [OrderEvent.CREATED, OrderEvent.UPDATED, OrderEvent.ASSIGNED])
+
+    def test_poll_returns_events_after_cursor(self):
+        first_order = self.register_order()
+        last_event_id = get_last_event_id()
+        second_order = self.register_order()
+
+        events = wait_for_order_events(last_event_id, timeout=0)
+
+        order_ids = {event['order_id'] for event in events if event['id'] > last_event_id}
+        self.assertEqual(order_ids, {second_order.id})
+        self.assertNotIn(first_order.id, order_ids)
+
+    def test_poll_does_not_wait_when_events_are_ready(self):
+        self.register_order()
+        started_at = time.monotonic()
+        self.assertTrue(wait_for_order_events(0, timeout=5))
+        self.assertLess(time.monotonic() - started_at, 1)
+
+    @override_settings(ORDER_EVENTS_TTL=0)
+    def test_purge_command_deletes_old_events(self):
+        self.register_order()
+        stdout = StringIO()
+        call_command('purge_order_events', stdout=stdout)
+        self.assertFalse(OrderEvent.objects.exists())
+        self.assertIn('Удалено событий: 1', stdout.getvalue())
+
+    def test_board_row_hides_filtered_out_order(self):
+        order = self.register_order()
+        self.assertEqual(select_board_order(order.id, restaurant=UNASSIGNED_RESTAURANT).total_cost, 200)
+
+        order.restaurant = self.restaurant
+        order.save()
+        self.assertIsNone(select_board_order(order.id, restaurant=UNASSIGNED_RESTAURANT))
+
+
+class OrderRowCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name='Товар', price=100, image='')
+
+    def test_only_changed_rows_are_rendered(self):
+        orders = [
+            Order(firstname='Иван', lastname='Иванов', phonenumber='+79291000000', address='Москва')
+            for _ in range(3)
+        ]
+        Order.objects.bulk_register([
+            (order, [OrderItem(product=self.product, quantity=1, price=100)])
+            for order in orders
+        ])
+        render_order_rows(list(Order.objects.all()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderItem.objects.create(order=orders[0], product=self.product, quantity=1, price=100)
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = render_order_rows(list(Order.objects.order_by('id')))
+
+        item_queries = [query for query in queries if 'foodcartapp_orderitem' in query['sql']]
+        self.assertEqual(len(item_queries), 1)
+        self.assertIn(f'IN ({orders[0].id})', item_queries[0]['sql'])
+        self.assertIn('<td>200,00</td>', rows[0].row_html)
+        self.assertIn('<td>100,00</td>', rows[1].row_html)
+
+
+class QueryPlanTest(TestCase):
+    # заказов в работе мало, выполненных — много, как в боевой базе
+    OPEN_ORDERS_COUNT = 50
+    DONE_ORDERS_COUNT = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+        cls.product = Product.objects.create(name='Товар', price=100, image='')
+        registered_at = timezone.now() - timedelta(days=365)
+        cls.orders = Order.objects.bulk_create(
+            Order(
+                firstname='Иван',
+                lastname='Иванов',
+                phonenumber=f'+7929{number:07}',
+                address='Москва',
+                status=Order.DONE if number < cls.DONE_ORDERS_COUNT else Order.CREATE,
+                restaurant=cls.restaurant if number % 2 else None,
+                registered_at=registered_at + timedelta(minutes=number),
+            )
+            for number in range(cls.DONE_ORDERS_COUNT + cls.OPEN_ORDERS_COUNT)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=cls.product, quantity=1, price=100)
+            for order in cls.orders
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def get_sequential_scans(self, queryset):
+        if connection.vendor == 'postgresql':
+            # на маленькой тестовой базе Postgres предпочтёт перебор любому индексу,
+            # поэтому проверяем, что индекс у запроса вообще есть
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return [line for line in queryset.explain().splitlines() if 'Seq Scan' in line]
+        return [
+            line for line in queryset.explain().splitlines()
+            if re.search(r'\bSCAN \w+$', line)
+        ]
+
+    def assertUsesIndex(self, queryset):
+        self.assertEqual(self.get_sequential_scans(queryset), [], queryset.query)
+
+    def test_order_board_queries(self):
+        open_order = self.orders[-1]
+        board_filters = [
+            {},
+            {'status': Order.CREATE},
+            {'payment_type': UNSELECTED_PAYMENT_TYPE},
+            {'payment_type': Order.CASH},
+            {'restaurant': UNASSIGNED_RESTAURANT},
+            {'restaurant': str(self.restaurant.id)},
+        ]
+        for filters in board_filters:
+            for after in [None, encode_cursor(open_order)]:
+                with self.subTest(filters=filters, after=after):
+                    orders = get_board_orders_page_query(after=after, **filters)[:BOARD_PAGE_SIZE + 1]
+                    self.assertUsesIndex(orders)
+
+    def test_board_row_queries(self):
+        order_ids = [order.id for order in self.orders[-BOARD_PAGE_SIZE:]]
+        self.assertUsesIndex(OrderItem.objects.filter(order__in=order_ids))
+        self.assertUsesIndex(OrderRestaurantCandidate.objects.filter(order__in=order_ids))
+        self.assertUsesIndex(OrderEvent.objects.filter(id__gt=100).order_by('id'))
+
+    def test_order_lookup_queries(self):
+        self.assertUsesIndex(Order.objects.by_phonenumber(self.orders[0].phonenumber))
+        self.assertUsesIndex(
+            Order.objects
+            .awaiting_restaurant()
+            .filter(candidates_updated_at__isnull=True)
+            .order_by('registered_at')
+        )
+        self.assertUsesIndex(
+            Order.objects
+            .filter(status=Order.DONE, registered_at__lt=timezone.now())
+            .order_by('registered_at')
+        )
+
+
+class BatchGeocoderTest(TestCase):
+    def setUp(self):
+        geocode_cache.clear()
+
+    def test_fetch_coordinates_batch(self):
+        Location.objects.create(
+            address='Москва, Тверская, 1',
+            updated_at=timezone.now(),
+            latitude=55.75,
+            longitude=37.61,
+        )
+        addresses = ['Москва, Тверская, 1', 'Москва, Арбат, 2', 'Москва, Арбат, 2', 'Нигде', '']
+
+        with FakeGeocoderServer(unknown_addresses=['Нигде']) as server:
+            with override_settings(YANDEX_GEOCODER_URL=server.url):
+                coordinates = fetch_coordinates_batch('apikey', addresses)
+
+        self.assertEqual(server.requests_count, 2)
+        self.assertEqual(coordinates, {
+            'Москва, Тверская, 1': (55.75, 37.61),
+            'Москва, Арбат, 2': get_fake_coordinates('Москва, Арбат, 2'),
+        })
+        self.assertTrue(Location.objects.filter(address='москва арбат 2').exists())
+        self.assertFalse(Location.objects.filter(address='нигде').exists())
+
+    def test_geocode_restaurants_keeps_coordinates_when_address_not_found(self):
+        found = Restaurant.objects.create(name='Найден', address='Москва, Арбат, 2', latitude=1, longitude=1)
+        lost = Restaurant.objects.create(name='Не найден', address='Нигде', latitude=55.7, longitude=37.6)
+
+        with FakeGeocoderServer(unknown_addresses=['Нигде']) as server:
+            with override_settings(YANDEX_GEOCODER_URL=server.url):
+                with patch('foodcartapp.catalog.refresh_catalog_snapshot') as refresh_catalog_snapshot:
+                    with self.captureOnCommitCallbacks(execute=True):
+                        call_command('geocode_restaurants', '--all', stdout=StringIO())
+
+        found.refresh_from_db()
+        lost.refresh_from_db()
+        self.assertEqual(found.coordinates, get_fake_coordinates('Москва, Арбат, 2'))
+        self.assertEqual(lost.coordinates, (55.7, 37.6))
+        self.assertEqual(refresh_catalog_snapshot.call_count, 1)
+
+    def test_slow_geocoder_times_out(self):
+        with FakeGeocoderServer(delay=1) as server:
+            with override_settings(YANDEX_GEOCODER_URL=server.url, GEOCODER_TIMEOUT=0.1):
+                coordinates = fetch_coordinates_batch('apikey', ['Москва, Арбат, 2'])
+
+        self.assertEqual(coordinates, {})
+
+    def test_memory_cache_skips_database(self):
+        with FakeGeocoderServer() as server:
+            with override_settings(YANDEX_GEOCODER_URL=server.url):
+                fetch_coordinates_batch('apikey', ['Москва, Арбат, 2'])
+                with self.assertNumQueries(0):
+                    coordinates = fetch_coordinates_batch('apikey', ['Москва, Арбат, 2'])
+
+        self.assertEqual(server.requests_count, 1)
+        self.assertEqual(coordinates, {'Москва, Арбат, 2': get_fake_coordinates('Москва, Арбат, 2')})
+        self.assertEqual(geocode_cache.stats()['memory_hits'], 1)
+
+    def test_stale_location_is_refreshed(self):
+        Location.objects.create(
+            address='Москва, Арбат, 2',
+            updated_at=timezone.now() - timedelta(days=365),
+            latitude=1,
+            longitude=1,
+        )
+
+        with FakeGeocoderServer() as server:
+            with override_settings(YANDEX_GEOCODER_URL=server.url):
+                coordinates = fetch_coordinates_batch('apikey', ['Москва, Арбат, 2'])
+
+        self.assertEqual(server.requests_count, 1)
+        self.assertEqual(coordinates, {'Москва, Арбат, 2': get_fake_coordinates('Москва, Арбат, 2')})
+        location = Location.objects.get(address='москва арбат 2')
+        self.assertEqual((location.latitude, location.longitude), get_fake_coordinates('Москва, Арбат, 2'))
+        self.assertGreater(location.updated_at, timezone.now() - timedelta(minutes=1))
+
+    def test_stale_location_is_served_when_geocoder_fails(self):
+        Location.objects.create(
+            address='Москва, Арбат, 2',
+            updated_at=timezone.now() - timedelta(days=365),
+            latitude=1,
+            longitude=1,
+        )
+
+        with FakeGeocoderServer(unknown_addresses=['Москва, Арбат, 2']) as server:
+            with override_settings(YANDEX_GEOCODER_URL=server.url):
+                coordinates = fetch_coordinates_batch('apikey', ['Москва, Арбат, 2'])
+
+        self.assertEqual(coordinates, {'Москва, Арбат, 2': (1, 1)})
+        self.assertEqual(geocode_cache.stats()['size'], 0)
+
+    def test_address_variants_share_one_location(self):
+        addresses = ['ул. Ленина, д. 5', 'улица ленина 5 ', 'г. Москва, Ленинский пр-т, 5-А', 'Москва, Ленинский проспект 5 а']
+
+        with FakeGeocoderServer() as server:
+            with override_settings(YANDEX_GEOCODER_URL=server.url):
+                coordinates = fetch_coordinates_batch('apikey', addresses)
+
+        self.assertEqual(server.requests_count, 2)
+        self.assertEqual(set(coordinates), set(addresses))
+        self.assertEqual(coordinates['ул. Ленина, д. 5'], coordinates['улица ленина 5 '])
+        self.assertEqual(
+            set(Location.objects.values_list('address', flat=True)),
+            {'улица ленина 5', 'москва ленинский проспект 5а'},
+        )
+
+    def test_normalize_address(self):
+        self.assertEqual(normalize_address('Москва, б-р Яна Райниса, 5/2 к1'), 'москва бульвар яна райниса 5/2 корпус 1')
+        self.assertEqual(normalize_address('  Ёлочная ул.,, 3, стр. 2 '), 'елочная улица 3 строение 2')
+
+    def test_cache_evicts_least_recently_used_and_expired(self):
+        cache = GeocodeCache(max_size=2, ttl=60, max_age=timedelta(days=1))
+        updated_at = timezone.now()
+        cache.set_many({'Первый': (1, 1, updated_at), 'Второй': (2, 2, updated_at)})
+        cache.get_many(['Первый'])
+        cache.set_many({'Третий': (3, 3, updated_at)})
+        self.assertEqual(cache.get_many(['Первый', 'Второй', 'Третий']), {'Первый': (1, 1), 'Третий': (3, 3)})
+
+        cache.set_many({'Старый': (4, 4, updated_at - timedelta(days=2))})
+        self.assertEqual(cache.get_many(['Старый']), {})
+
+        cache.ttl = 0
+        cache.set_many({'Первый': (1, 1, updated_at)})
+        self.assertEqual(cache.get_many(['Первый']), {})
+        self.assertEqual(cache.stats()['expired'], 1)
+
+
+class RestaurantGeocodingTest(TestCase):
+    def setUp(self):
+        geocode_cache.clear()
+
+    def test_admin_address_change_is_geocoded_after_commit(self):
+        restaurant = Restaurant.objects.create(name='Ресторан', address='Москва, Пречистенка, 5')
+
+        with FakeGeocoderServer() as server:
+            with override_settings(YANDEX_GEOCODER_URL=server.url):
+                with self.captureOnCommitCallbacks(execute=True):
+                    restaurant_address_changed.send(sender=Restaurant, instance=restaurant)
+                    self.assertEqual(server.requests_count, 0)
+
+        self.assertEqual(server.requests_count, 1)
+        restaurant.refresh_from_db()
+        self.assertEqual(restaurant.coordinates, get_fake_coordinates('Москва, Пречистенка, 5'))
+
+
+class DistanceMatrixTest(SimpleTestCase):
+    def get_relative_errors(self, start_coordinates, end_coordinates):
+        matrix = compute_distance_matrix(start_coordinates, end_coordinates)
+        return [
+            abs(matrix[row][column] - distance.distance(start, end).km) / distance.distance(start, end).km
+            for row, start in enumerate(start_coordinates)
+            for column, end in enumerate(end_coordinates)
+            if start != end
+        ]
+
+    def test_error_against_geodesic_is_within_documented_bounds(self):
+        coordinates = [
+            (latitude, longitude)
+            for latitude in range(-80, 81, 20)
+            for longitude in (-170, -60, 0, 37, 120)
+        ]
+        self.assertLessEqual(max(self.get_relative_errors(coordinates, coordinates[::7])), 0.006)
+
+        moscow = [(55.55 + step * 0.04, 37.35 + step * 0.05) for step in range(10)]
+        self.assertLessEqual(max(self.get_relative_errors(moscow, moscow[::-1][:5])), 0.0035)
+
+
+class RestaurantSpatialIndexTest(TestCase):
+    def test_nearest_matches_brute_force(self):
+        restaurants = [
+            (restaurant_id, 55.55 + restaurant_id % 20 * 0.02, 37.35 + restaurant_id // 20 * 0.025)
+            for restaurant_id in range(400)
+        ]
+        index = RestaurantSpatialIndex(1, restaurants + [(400, None, None)])
+        customer = (55.751, 37.618)
+        distances = compute_distance_matrix([customer], [(lat, lon) for _, lat, lon in restaurants])[0]
+
+        def accept(restaurant_id):
+            return restaurant_id % 2 == 0
+
+        expected = sorted(
+            (distance, restaurant_id)
+            for (restaurant_id, _, _), distance in zip(restaurants, distances)
+            if accept(restaurant_id) and distance <= 5
+        )[:7]
+        found = index.nearest(customer, k=7, radius_km=5, accept=accept)
+
+        self.assertEqual([restaurant_id for restaurant_id, _ in found], [restaurant_id for _, restaurant_id in expected])
+        for (_, found_distance), (expected_distance, _) in zip(found, expected):
+            self.assertAlmostEqual(found_distance, expected_distance, places=6)
@@ -14,6 +14,8 @@ urlpatterns = [
 
     # TODO заглушка для нереализованного функционала
     path('orders/', views.view_orders, name="view_orders"),
+    path('orders/events/', views.view_order_events, name="order_events"),
+    path('orders/<int:order_id>/row/', views.view_order_row, name="order_row"),
 
     path('login/', views.LoginView.as_view(), name="login"),
     path('logout/', views.LogoutView.as_view(), name="logout"),
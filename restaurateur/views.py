@@ -1,15 +1,18 @@
 from django import forms
-from django.conf import settings
 from django.contrib.auth.decorators import user_passes_test
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 from django.views import View
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
 
-from foodcartapp.models import Order, OrderItem, Product, Restaurant, RestaurantMenuItem
-from restaurateur.services import fetch_coordinates, compute_distance
+from foodcartapp.models import Order, Product, Restaurant
+from restaurateur.board import UNASSIGNED_RESTAURANT, UNSELECTED_PAYMENT_TYPE, select_board_order, select_board_orders
+from restaurateur.events import get_last_event_id, wait_for_order_events
+from restaurateur.row_cache import render_order_rows
 
 
 class Login(forms.Form):
@@ -29,6 +32,31 @@ class Login(forms.Form):
     )
 
 
+class OrderBoardFilter(forms.Form):
+    status = forms.ChoiceField(
+        label='Статус', required=False,
+        choices=[('', 'Все')] + [choice for choice in Order.STATE_CHOICES if choice[0] != Order.DONE],
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    payment_type = forms.ChoiceField(
+        label='Способ оплаты', required=False,
+        choices=[('', 'Все'), (UNSELECTED_PAYMENT_TYPE, 'Не выбрано')] + Order.PAYMENT_TYPE_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    restaurant = forms.ChoiceField(
+        label='Ресторан', required=False,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['restaurant'].choices = [
+            ('', 'Все'),
+            (UNASSIGNED_RESTAURANT, 'Не назначен'),
+            *Restaurant.objects.order_by('name').values_list('id', 'name'),
+        ]
+
+
 class LoginView(View):
     def get(self, request, *args, **kwargs):
         form = Login()
@@ -93,47 +121,57 @@ def view_restaurants(request):
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_orders(request):
-    restaurants = {restaurant.id: restaurant.name for restaurant in Restaurant.objects.all()}
-    addresses = {restaurant.id: restaurant.address for restaurant in Restaurant.objects.all()}
-
-    orders = (
-        Order.objects.with_cost_in_total().select_related('restaurant')
-        .exclude(status=Order.DONE).order_by('registered_at', 'status'))
-
-    restaurants_menus = (RestaurantMenuItem.objects.select_related('restaurant', 'product').filter(availability=True)
-                         .order_by('product'))
-    restaurants_menus_product_ids = {}
-    for menu in restaurants_menus:
-        restaurants_menus_product_ids.setdefault(menu.restaurant.id, [])
-        restaurants_menus_product_ids[menu.restaurant.id].append(menu.product_id)
-
-    for order in orders:
-        order.status = dict(Order.STATE_CHOICES)[order.status]
-        order.payment_type = (
-            'Не выбрано' if order.payment_type == '' else dict(Order.PAYMENT_TYPE_CHOICES)[order.payment_type])
+    filter_form = OrderBoardFilter(request.GET)
+    filters = filter_form.cleaned_data if filter_form.is_valid() else {}
+    # курсор событий берётся до выборки заказов, чтобы не пропустить изменения между ними
+    last_event_id = get_last_event_id()
+    orders, next_cursor = select_board_orders(after=request.GET.get('after'), **filters)
+
+    next_page_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['after'] = next_cursor
+        next_page_url = f'?{query.urlencode()}'
+    first_page_query = request.GET.copy()
+    first_page_query.pop('after', None)
 
-        if not order.restaurant:
-            order_items = Order.objects.get(id=order.id).items.select_related('product').all()
-            order_items = [item.product.id for item in order_items]
-
-            available_restaurants = []
-            for restaurant_id in restaurants.keys():
-                if set(order_items).issubset(restaurants_menus_product_ids[restaurant_id]):
-                    available_restaurants.append(restaurant_id)
-
-            customer_coords = fetch_coordinates(settings.YANDEX_GEO_API_KEY, order.address)
-
-            order.restaurants = [restaurants[rest_id] for rest_id in available_restaurants]
+    return render(request, template_name='order_items.html', context={
+        'order_items': render_order_rows(orders),
+        'filter_form': filter_form,
+        'next_page_url': next_page_url,
+        'first_page_url': f'?{first_page_query.urlencode()}',
+        'is_first_page': 'after' not in request.GET,
+        'last_event_id': last_event_id,
+        'events_poll_interval': settings.ORDER_EVENTS_POLL_INTERVAL,
+    })
 
-            for index, restaurant in enumerate(available_restaurants):
-                restaurant_coords = fetch_coordinates(settings.YANDEX_GEO_API_KEY, addresses[restaurant])
 
-                distance = compute_distance(customer_coords, restaurant_coords)
-                order.restaurants[index] = f'{restaurants[restaurant]} - {round(distance, 2)} км.'
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_order_row(request, order_id):
+    filter_form = OrderBoardFilter(request.GET)
+    filters = filter_form.cleaned_data if filter_form.is_valid() else {}
+    order = select_board_order(order_id, **filters)
+    if not order:
+        return HttpResponse(status=204)
+
+    board_url = reverse('restaurateur:view_orders')
+    if request.GET:
+        board_url = f'{board_url}?{request.GET.urlencode()}'
+
+    return render(request, template_name='order_row.html', context={
+        'item': render_order_rows([order])[0],
+        'board_url': board_url,
+    })
 
-        else:
-            order.restaurants = [order.restaurant, ]
 
-    return render(request, template_name='order_items.html', context={
-        'order_items': orders,
-    })
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_order_events(request):
+    try:
+        after = int(request.GET['after'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Укажите after — id последнего полученного события'}, status=400)
+
+    events = wait_for_order_events(after, timeout=settings.ORDER_EVENTS_WAIT)
+    response = JsonResponse({'events': events})
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -1,6 +1,7 @@
 import os
 
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from environs import Env
 from pygit2 import Repository
 
@@ -93,6 +94,32 @@ if env.bool('TEST_DB', False):
 else:
     DATABASES = {'default': dj_database_url.config(default=env.str("DB_CONF_URL"))}
 
+# версия каталога, снимки и кэш строк доски должны быть общими для всех воркеров:
+# кэш в памяти процесса отдавал бы в соседних воркерах старый каталог бесконечно.
+# Строк доски много и они дешёвые, поэтому у них свой кэш: переполнение
+# вытесняет из него только строки, а не каталог
+CACHES = {
+    'default': {
+        'BACKEND': env.str('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': env.str('CACHE_LOCATION', 'django_cache'),
+    },
+    'order_rows': {
+        'BACKEND': env.str('ORDER_ROWS_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': env.str('ORDER_ROWS_CACHE_LOCATION', 'django_cache_order_rows'),
+    },
+}
+# DatabaseCache, переполнившись, удаляет ключи с наименьшими именами — среди них
+# версия и снимок каталога. Ключей там немного, запас нужен, чтобы до этого не дошло
+CACHE_MAX_ENTRIES = {
+    'default': env.int('CACHE_MAX_ENTRIES', 100000),
+    'order_rows': env.int('ORDER_ROWS_CACHE_MAX_ENTRIES', 100000),
+}
+for cache_alias, cache_settings in CACHES.items():
+    if cache_settings['BACKEND'] == 'django.core.cache.backends.db.DatabaseCache':
+        cache_settings['OPTIONS'] = {'MAX_ENTRIES': CACHE_MAX_ENTRIES[cache_alias]}
+    if cache_settings['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache' and not DEBUG:
+        raise ImproperlyConfigured('LocMemCache не общий для воркеров, используйте его только с DEBUG=true')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -130,6 +157,22 @@ STATICFILES_DIRS = [
 ]
 
 YANDEX_GEO_API_KEY = env.str('YANDEX_API_KEY')
+YANDEX_GEOCODER_URL = env.str('YANDEX_GEOCODER_URL', 'https://geocode-maps.yandex.ru/1.x')
+GEOCODER_TIMEOUT = env.float('GEOCODER_TIMEOUT', 5)
+GEOCODER_MAX_WORKERS = env.int('GEOCODER_MAX_WORKERS', 8)
+GEOCODE_CACHE_SIZE = env.int('GEOCODE_CACHE_SIZE', 10000)
+GEOCODE_CACHE_TTL = env.int('GEOCODE_CACHE_TTL', 60 * 60)
+LOCATION_MAX_AGE_DAYS = env.int('LOCATION_MAX_AGE_DAYS', 30)
+ORDER_CANDIDATES_LIMIT = env.int('ORDER_CANDIDATES_LIMIT', 10)
+ORDER_CANDIDATES_RADIUS_KM = env.float('ORDER_CANDIDATES_RADIUS_KM', 50)
+
+ORDER_INTAKE_MODE = env.str('ORDER_INTAKE_MODE', 'sync')
+ORDER_INTAKE_MAX_DEPTH = env.int('ORDER_INTAKE_MAX_DEPTH', 10000)
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+ORDER_EVENTS_WAIT = env.float('ORDER_EVENTS_WAIT', 1)
+ORDER_EVENTS_POLL_INTERVAL = env.float('ORDER_EVENTS_POLL_INTERVAL', 3)
+ORDER_EVENTS_TTL = env.int('ORDER_EVENTS_TTL', 60 * 60)
+ORDER_ARCHIVE_AFTER_DAYS = env.int('ORDER_ARCHIVE_AFTER_DAYS', 90)
 
 ROLLBAR = {
     'access_token': env('ROLLBAR_TOKEN'),